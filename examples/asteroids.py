@@ -1,5 +1,4 @@
 import random
-import time
 
 import kurses.stream
 from kurses import VirtualTerminal, StreamBuffer
@@ -28,7 +27,7 @@ def random_asteroid(_x=(0, 80), _y=(0, 30)):
     )
 
 
-console = VirtualTerminal(font_filename="ModernDOS8x16.ttf", quality=QualityFont.LCD)
+console = VirtualTerminal(font_filename="ModernDOS8x16.ttf", quality=QualityFont.LCD, fps=40)
 
 main_buffer = console.stream
 
@@ -49,8 +48,6 @@ def loop():
     global x_ship, y_ship, life, score
     rows, columns = main_buffer.buffersize
 
-    time.sleep(0.025)
-
     for stream in console.streams:
         stream.clrscr()
 
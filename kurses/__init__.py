@@ -1,2 +1,14 @@
-from kurses.backend import VirtualTerminal, AudioSystem, Effect, Music
+import typing
+
 from kurses.stream import StreamBuffer
+
+__ALL_BACKEND_NAMES = ("VirtualTerminal", "HeadlessTerminal", "AudioSystem", "Effect", "Music")
+
+
+def __getattr__(name: str) -> typing.Any:
+    if name not in __ALL_BACKEND_NAMES:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    import kurses.backend
+
+    return getattr(kurses.backend, name)
@@ -1,29 +1,44 @@
-# So, I need work her
-from kurses.backend.sdl2.resources import SDL2AudioSystem
-
-try:
-    import sdl2
-
-    from kurses.backend.sdl2.font_resources import SDL2FontResources
-    from kurses.backend.sdl2.texture_surface import SDL2TextureSurface
-    from kurses.backend.sdl2 import SDL2VirtualTerminal
-    from kurses.backend.sdl2.bitmap_surface import SDL2BitmapSurface
-    from kurses.backend.sdl2.interface.joystick import SDL2JoystickInterface
-    from kurses.backend.sdl2.resources.mixer import SDL2Effect, SDL2Music, SDL2Buzzer
-
-    VirtualTerminal = SDL2VirtualTerminal
-    FontResources = SDL2FontResources
-    TextureSurface = SDL2TextureSurface
-    BitmapSurface = SDL2BitmapSurface
-    JoystickInterface = SDL2JoystickInterface
-    AudioSystem = SDL2AudioSystem
-    Effect = SDL2Effect
-    Music = SDL2Music
-
-except ImportError:
+import importlib
+import importlib.util
+import typing
+
+if importlib.util.find_spec("sdl2") is None:
     try:
         raise ImportError("The module for Pygame has not been implemented yet.")
     except ImportError:
         raise ImportError("You need install pySDL2 for this module work!")
 
-__all__ = ["VirtualTerminal", "AudioSystem", "Effect", "Music"]
+# The classes of the backend are imported on first access (PEP 562), so importing kurses does not load SDL2_mixer,
+# SDL2_gfx, NumPy or asyncio until the matching API is used.
+__ALL_BACKEND_CLASSES: typing.Dict[str, typing.Tuple[str, str]] = {
+    "VirtualTerminal": ("kurses.backend.sdl2", "SDL2VirtualTerminal"),
+    "HeadlessTerminal": ("kurses.backend.sdl2.headless", "SDL2HeadlessTerminal"),
+    "FontResources": ("kurses.backend.sdl2.font_resources", "SDL2FontResources"),
+    "TextureSurface": ("kurses.backend.sdl2.texture_surface", "SDL2TextureSurface"),
+    "BitmapSurface": ("kurses.backend.sdl2.bitmap_surface", "SDL2BitmapSurface"),
+    "JoystickInterface": ("kurses.backend.sdl2.interface.joystick", "SDL2JoystickInterface"),
+    "KeyboardInterface": ("kurses.backend.sdl2.interface.keyboard", "SDL2KeyboardInterface"),
+    "AudioSystem": ("kurses.backend.sdl2.resources", "SDL2AudioSystem"),
+    "Effect": ("kurses.backend.sdl2.resources.mixer", "SDL2Effect"),
+    "Music": ("kurses.backend.sdl2.resources.mixer", "SDL2Music"),
+    "Buzzer": ("kurses.backend.sdl2.resources.mixer", "SDL2Buzzer"),
+}
+
+
+def __getattr__(name: str) -> typing.Any:
+    if name not in __ALL_BACKEND_CLASSES:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    module_name, class_name = __ALL_BACKEND_CLASSES[name]
+    value = getattr(importlib.import_module(module_name), class_name)
+
+    globals()[name] = value
+
+    return value
+
+
+def __dir__() -> typing.List[str]:
+    return sorted(set(globals()) | set(__ALL_BACKEND_CLASSES))
+
+
+__all__ = ["VirtualTerminal", "HeadlessTerminal", "AudioSystem", "Effect", "Music"]
@@ -1,5 +1,8 @@
 import ctypes
+import inspect
 import math
+import queue
+import threading
 import typing
 
 import sdl2
@@ -10,10 +13,12 @@ import kurses.backend.sdl2.interface.joystick
 import kurses.backend.sdl2.texture_surface
 import kurses.colors
 import kurses.events
+import kurses.font_resources
+import kurses.interface.joystick
+import kurses.interface.keyboard
 import kurses.stream
 import kurses.term
-from kurses.backend.sdl2.resources import SDL2AudioSystem
-from kurses.backend.sdl2.resources.mixer import SDL2Buzzer
+from kurses.backend.sdl2.clock import SDL2FrameClock
 from kurses.interface.battery import BatteryType, BatteryStatus
 from kurses.interface.sensors import AccelerometerType, GyroscopeType
 from kurses.interface.touch import TouchType
@@ -21,6 +26,10 @@ from kurses.resources.buzzer import Buzzer
 from kurses.stream import StreamBuffer
 
 
+EVENTS_BATCH_SIZE = 64
+ASYNC_IDLE_DELAY = 0.01
+
+
 def chr_format_key_sdl2(s):
     return s.decode().lower()
 
@@ -39,58 +48,89 @@ class SDL2VirtualTerminal(kurses.term.VirtualTerminal):
         ['left', 'right', 'middle']
     ]
 
+    __ALL_WINDOW_EVENTS: typing.Dict[int, str] = {
+        sdl2.SDL_WINDOWEVENT_MINIMIZED: "minimized",
+        sdl2.SDL_WINDOWEVENT_SHOWN: "showed",
+        sdl2.SDL_WINDOWEVENT_EXPOSED: "exposed",
+        sdl2.SDL_WINDOWEVENT_RESTORED: "restored",
+    }
+
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
 
-        if sdl2.SDL_WasInit(sdl2.SDL_INIT_EVERYTHING) == 0:
-            sdl2.SDL_Init(sdl2.SDL_INIT_EVERYTHING)
+        if sdl2.SDL_WasInit(sdl2.SDL_INIT_VIDEO) == 0:
+            sdl2.SDL_InitSubSystem(sdl2.SDL_INIT_VIDEO)
 
         if sdl2.sdlttf.TTF_WasInit() == 0:
             sdl2.sdlttf.TTF_Init()
 
         width, height = kwargs.get("size", (640, 480))
-        position_x, position_y = self.__DEFAULT_WINDOW_POSITION
-        self.__c_window = sdl2.SDL_CreateWindow(
-            kwargs.get("title", "Virtual terminal").encode(),
-            position_x,
-            position_y,
-            width,
-            height,
-            sdl2.SDL_WINDOW_SHOWN
-        )
 
-        self.__c_renderer = sdl2.SDL_CreateRenderer(
-            self.window,
-            -1,
-            [sdl2.SDL_RENDERER_ACCELERATED, sdl2.SDL_RENDERER_SOFTWARE][self.type_rendering.value]
-        )
+        self.__c_window = self._create_window(width, height, **kwargs)
+        self.__c_renderer = self._create_renderer(self.__c_window)
 
         self.__target = kurses.events.empty_target
         self.__runtime_class = None
         self.__runtime = kurses.events.EmptyTargetRuntime()
 
-        self.__font = kurses.backend.FontResources(self._font_filename)
+        self.__font = kurses.backend.FontResources(self._font_filename, **kwargs)
         self.__textures_font = kurses.backend.TextureSurface(self.__font, self.streams)
         self.__bitmap = kurses.backend.BitmapSurface((width, height), self.graphics) if self.bitmap_enabled else None
         self.__joystick = kurses.backend.JoystickInterface()
+        self.__joystick_opened = False
+        self.__keyboard: typing.Optional[kurses.interface.keyboard.KeyboardInterface] = None
         self.__mouse = [], (0, 0), (0, 0)
+        self.__mouse_delta = 0, 0
+        self.__motion: typing.Optional[typing.Tuple[int, int, int]] = None
+        self.__scroll = 0
+        self.__batch: typing.Optional[typing.List[kurses.events.EventType]] = None
+        self.__awaitables: typing.Optional[typing.List[typing.Awaitable]] = None
+
+        self.pipelined = kwargs.get("pipelined", False)
+        self.__clock = SDL2FrameClock()
 
         self.__current_resizable_window = kwargs.get("resizable_window", True)
         self.resizable_window = self.__current_resizable_window
 
         if self.sound_enabled:
-            self.__system_sound = SDL2AudioSystem()
+            self.__system_sound = kurses.backend.AudioSystem()
 
-        self.__buzzer = SDL2Buzzer()
+        self.__buzzer: typing.Optional[Buzzer] = None
 
         self.__c_sensors = {}
         self.__num_sensors = 0
+        self.__sensors_opened = False
         self.__gyroscope = False, (0, 0, 0)
         self.__accelerometer = False, (0, 0, 0)
 
         self.__c_active_fingers = {}
 
+        self.__exposed = True
+        self.__wake_event_type = sdl2.SDL_RegisterEvents(1)
+
+        self.__size = width, height
+        self.__key_names: typing.Dict[int, str] = {}
+        self.__c_event = sdl2.SDL_Event()
+        self.__c_events = (sdl2.SDL_Event * EVENTS_BATCH_SIZE)()
+        self.__event_handlers: typing.Dict[int, typing.Callable[[sdl2.SDL_Event], None]] = {
+            sdl2.SDL_QUIT: self.__on_quit,
+            sdl2.SDL_WINDOWEVENT: self.__on_window,
+            sdl2.SDL_RENDER_TARGETS_RESET: self.__on_render_reset,
+            sdl2.SDL_RENDER_DEVICE_RESET: self.__on_render_reset,
+            sdl2.SDL_KEYDOWN: self.__on_key_down,
+            sdl2.SDL_KEYUP: self.__on_key_up,
+            sdl2.SDL_MOUSEWHEEL: self.__on_mouse_wheel,
+            sdl2.SDL_MOUSEMOTION: self.__on_mouse_motion,
+            sdl2.SDL_SENSORUPDATE: self.__on_sensor_update,
+            sdl2.SDL_FINGERDOWN: self.__on_finger_down,
+            sdl2.SDL_FINGERMOTION: self.__on_finger_motion,
+            sdl2.SDL_FINGERUP: self.__on_finger_up,
+        }
+
     def __del__(self):
+        if self.__buzzer is not None:
+            self.__buzzer.close()
+
         for s_id in self.__c_sensors:
             sdl2.SDL_SensorClose(self.__c_sensors[s_id]["handle"])
 
@@ -100,10 +140,53 @@ class SDL2VirtualTerminal(kurses.term.VirtualTerminal):
         if self.__c_window is not None:
             sdl2.SDL_DestroyWindow(self.__c_window)
 
+    def _create_window(self, width: int, height: int, **kwargs) -> typing.Optional[sdl2.SDL_Window]:
+        """
+        Create the window of the terminal.
+
+        :param width: Width of window.
+        :param height: Height of window.
+        :return: typing.Optional[sdl2.SDL_Window]
+        """
+        position_x, position_y = self.__DEFAULT_WINDOW_POSITION
+
+        return sdl2.SDL_CreateWindow(
+            kwargs.get("title", "Virtual terminal").encode(),
+            position_x,
+            position_y,
+            width,
+            height,
+            sdl2.SDL_WINDOW_SHOWN
+        )
+
+    def _create_renderer(self, window: typing.Optional[sdl2.SDL_Window]) -> sdl2.SDL_Renderer:
+        """
+        Create the renderer of the terminal.
+
+        :param window: Window created by _create_window.
+        :return: sdl2.SDL_Renderer
+        """
+        return sdl2.SDL_CreateRenderer(
+            window,
+            -1,
+            [sdl2.SDL_RENDERER_ACCELERATED, sdl2.SDL_RENDERER_SOFTWARE][self.type_rendering.value]
+        )
+
     @property
     def buzzer(self) -> Buzzer:
+        if self.__buzzer is None:
+            self.__buzzer = kurses.backend.Buzzer()
+
         return self.__buzzer
 
+    @property
+    def font(self) -> kurses.font_resources.FontResources:
+        return self.__font
+
+    @property
+    def clock(self) -> SDL2FrameClock:
+        return self.__clock
+
     @property
     def title(self):
         return sdl2.SDL_GetWindowTitle(self.window)
@@ -114,9 +197,7 @@ class SDL2VirtualTerminal(kurses.term.VirtualTerminal):
 
     @property
     def size(self) -> typing.Tuple[int, int]:
-        w, h = ctypes.c_int(), ctypes.c_int()
-        sdl2.SDL_GetWindowSize(self.window, ctypes.byref(w), ctypes.byref(h))
-        return w.value, h.value
+        return self.__size
 
     @property
     def resizable_window(self) -> bool:
@@ -136,16 +217,26 @@ class SDL2VirtualTerminal(kurses.term.VirtualTerminal):
     def set_runtime(self, target: typing.Type[kurses.events.EventTargetRuntime]):
         self.__runtime_class = target
 
-    def main_loop(self):
+    def __start(self):
         if self.__runtime_class is not None:
             self.__runtime = self.__runtime_class()
 
-        self.__runtime.load()
+        self.__batch = [] if type(self.__runtime).events is not kurses.events.EventTargetRuntime.events else None
+        self.__call("load")
 
         if self.__bitmap:
             self.__bitmap.create(self.surface)
 
-        self.__joystick.open()
+        self.__joystick_used = type(self.__runtime).joystick is not kurses.events.EventTargetRuntime.joystick
+
+        self._dt = 1.0 / self.fps if self.fps else 0.0
+        self.__clock.start()
+
+    def __open_sensors(self):
+        self.__sensors_opened = True
+
+        if sdl2.SDL_WasInit(sdl2.SDL_INIT_SENSOR) == 0:
+            sdl2.SDL_InitSubSystem(sdl2.SDL_INIT_SENSOR)
 
         self.__num_sensors = sdl2.SDL_NumSensors()
 
@@ -163,38 +254,335 @@ class SDL2VirtualTerminal(kurses.term.VirtualTerminal):
                     "handle": sensor_handle
                 }
 
-        while self.running:
-            event = sdl2.SDL_Event()
+    def __get_joystick_inputs(self) -> typing.List[kurses.interface.joystick.JoystickType]:
+        return self.joystick() if self.__joystick_used else []
+
+    def __is_idle(self) -> bool:
+        return self.idle and not self.__exposed and not self.pending and not self.__font.preloading
+
+    def __process_events(self):
+        self.__poll_events()
+        self.__flush_events()
+
+        if self.__keyboard is not None:
+            self.__keyboard.update()
+
+        if self.__font.preloading:
+            self.__font.upload(self.surface)
 
-            while sdl2.SDL_PollEvent(ctypes.byref(event)):
-                self.push_events(event)
+        self.profiler.lap("events")
 
-            self.__runtime.joystick(self.__joystick.inputs)
+    def __render(self):
+        if not self.idle or self.__exposed or self.pending:
+            self.update_overlay()
+            self.__draw_frame()
+
+    def __draw_frame(self):
+        self.__exposed = False
+        self.clean()
+        self.profiler.lap("clean")
+        self.draw()
+
+    def __end_frame(self):
+        self.profiler.lap("wait")
+        self.profiler.end(
+            glyphs=self.__font.glyphs_created, deferred=self.__font.glyphs_deferred, draw_calls=self.__get_draw_calls()
+        )
+
+    def main_loop(self, frames: typing.Optional[int] = None):
+        self.__start()
+
+        try:
+            if self.pipelined:
+                self.__main_loop_pipelined(frames)
+            else:
+                self.__main_loop(frames)
+        finally:
+            self.__font.flush()
+
+    def __main_loop(self, frames: typing.Optional[int]):
+        profiler = self.profiler
+
+        while self.running and (frames is None or frames > 0):
+            profiler.begin()
+
+            self.__mouse_delta = 0, 0
+
+            if self.__is_idle():
+                if self.__wait_event(self.__c_event):
+                    self.push_events(self.__c_event)
+
+                profiler.lap("idle")
+
+            self.__process_events()
+
+            self.__runtime.joystick(self.__get_joystick_inputs())
 
             if self.running:
                 self.__runtime.update(self.dt)
+                profiler.lap("update")
                 self.__target()
+                profiler.lap("target")
 
-            self.clean()
             self.__runtime.draw()
-            self.draw()
+
+            profiler.lap("draw")
+
+            self.__render()
+
+            self._dt = self.__clock.tick(self.fps)
+
+            self.__end_frame()
+
+            if frames is not None:
+                frames -= 1
+
+    def __main_loop_pipelined(self, frames: typing.Optional[int]):
+        jobs: queue.Queue = queue.Queue()
+        results: queue.Queue = queue.Queue()
+        worker = threading.Thread(target=self.__update_worker, args=(jobs, results), name="kurses-update", daemon=True)
+
+        streams = self.__textures_font.streams
+        graphics = self.__bitmap.graphics if self.__bitmap else None
+        render_streams: typing.List[StreamBuffer] = []
+
+        profiler = self.profiler
+
+        self.__textures_font.streams = render_streams
+
+        worker.start()
+        jobs.put(self.__get_joystick_inputs())
+
+        try:
+            while self.running and (frames is None or frames > 0):
+                profiler.begin()
+
+                snapshot = results.get()
+
+                profiler.lap("sync")
+
+                if isinstance(snapshot, BaseException):
+                    raise snapshot
+
+                snapshot_streams, snapshot_graphics = snapshot
+                pending = any(stream.pending for stream in snapshot_streams) or self.__textures_font.pending or (
+                        snapshot_graphics is not None and snapshot_graphics.pending)
+
+                self.__mouse_delta = 0, 0
+
+                if self.idle and not self.__exposed and not pending and not self.__font.preloading:
+                    if self.__wait_event(self.__c_event):
+                        self.push_events(self.__c_event)
+
+                    profiler.lap("idle")
+
+                self.__process_events()
+
+                # The joystick is polled in the thread of SDL, the inputs are passed to the update of the worker.
+                inputs = self.__get_joystick_inputs()
+
+                profiler.lap("events")
+
+                draw = not self.idle or self.__exposed or pending
+
+                # The overlay is written only in the frames drawn, its statistics change every frame.
+                if draw and self.overlay is not None:
+                    self.update_overlay()
+                    snapshot_streams = [
+                        live.snapshot() if live is self.overlay else stream
+                        for stream, live in zip(snapshot_streams, self.streams)
+                    ]
+
+                render_streams[:] = snapshot_streams
+
+                if snapshot_graphics is not None:
+                    self.__bitmap.graphics = snapshot_graphics
+
+                if self.running and (frames is None or frames > 1):
+                    jobs.put(inputs)
+
+                if draw:
+                    self.__draw_frame()
+
+                self._dt = self.__clock.tick(self.fps)
+
+                self.__end_frame()
+
+                if frames is not None:
+                    frames -= 1
+        finally:
+            jobs.put(None)
+            worker.join()
+
+            self.__textures_font.streams = streams
+
+            if self.__bitmap:
+                self.__bitmap.graphics = graphics
+
+    def __update_worker(self, jobs: queue.Queue, results: queue.Queue):
+        while True:
+            inputs = jobs.get()
+
+            if inputs is None:
+                break
+
+            try:
+                self.__runtime.joystick(inputs)
+
+                if self.running:
+                    self.__runtime.update(self.dt)
+                    self.__target()
+
+                self.__runtime.draw()
+
+                results.put((
+                    [stream.snapshot() for stream in self.streams],
+                    self.graphics.snapshot() if self.__bitmap else None
+                ))
+            except BaseException as e:
+                results.put(e)
+
+    async def run(self, frames: typing.Optional[int] = None):
+        """
+        Run virtual console as a task of asyncio, the loop yields to the event loop between the frames (the wait of
+        the frames per second is an asyncio sleep). The methods of the runtime and the target can be coroutines.
+
+        In idle mode the events are polled every idle_timeout milliseconds (or every frame), instead of blocking the
+        thread.
+
+        :param frames: Number of frames to run, with default value None (run until quit).
+        :return: None
+        """
+        import asyncio
+
+        self.__awaitables = []
+        self.__start()
+
+        profiler = self.profiler
+
+        try:
+            await self.__gather()
+
+            while self.running and (frames is None or frames > 0):
+                profiler.begin()
+
+                self.__mouse_delta = 0, 0
+
+                self.__process_events()
+                await self.__gather()
+
+                self.__call("joystick", self.__get_joystick_inputs())
+                await self.__gather()
+
+                if self.running:
+                    self.__call("update", self.dt)
+                    await self.__gather()
+                    profiler.lap("update")
+                    self.__await(self.__target())
+                    await self.__gather()
+                    profiler.lap("target")
+
+                self.__call("draw")
+                await self.__gather()
+
+                profiler.lap("draw")
+
+                self.__render()
+
+                await asyncio.sleep(self.__get_async_delay())
+                self._dt = self.__clock.tick(self.fps)
+
+                self.__end_frame()
+
+                if frames is not None:
+                    frames -= 1
+        finally:
+            self.__awaitables = None
+            self.__font.flush()
+
+    def __get_async_delay(self) -> float:
+        if self.__is_idle():
+            if self.idle_timeout is not None:
+                return self.idle_timeout / 1000.0
+
+            return self.__clock.remaining(self.fps) if self.fps else ASYNC_IDLE_DELAY
+
+        return max(self.__clock.remaining(self.fps) - self.__clock.spin_threshold, 0.0)
+
+    def __await(self, result: typing.Any):
+        if self.__awaitables is not None and inspect.isawaitable(result):
+            self.__awaitables.append(result)
+
+    async def __gather(self):
+        while self.__awaitables:
+            awaitables, self.__awaitables = self.__awaitables, []
+
+            for awaitable in awaitables:
+                await awaitable
+
+    def __call(self, name: str, *args):
+        self.__await(getattr(self.__runtime, name)(*args))
+
+    def __get_draw_calls(self) -> int:
+        draw_calls = self.__font.draw_calls + self.__textures_font.draw_calls
+
+        if self.__bitmap:
+            draw_calls += self.__bitmap.draw_calls
+
+        return draw_calls
+
+    def __wait_event(self, event: sdl2.SDL_Event) -> bool:
+        if self.idle_timeout is None:
+            return sdl2.SDL_WaitEvent(ctypes.byref(event)) == 1
+
+        return sdl2.SDL_WaitEventTimeout(ctypes.byref(event), int(self.idle_timeout)) == 1
+
+    @property
+    def pending(self) -> bool:
+        return super().pending or self.__textures_font.pending
+
+    def invalidate(self) -> None:
+        self.__exposed = True
+
+        event = sdl2.SDL_Event()
+        event.type = self.__wake_event_type
+        sdl2.SDL_PushEvent(ctypes.byref(event))
+
+    def preload(self, charset: typing.Union[str, typing.Iterable[int]], styles: typing.Iterable[int] = (0,),
+                colors: typing.Optional[kurses.font_resources.PreloadColors] = None,
+                progress: typing.Optional[kurses.font_resources.PreloadProgress] = None,
+                block: bool = False) -> kurses.font_resources.GlyphPreload:
+        preload = self.__font.preload(charset, styles, colors, progress)
+
+        while block and not preload.done:
+            self.__font.upload(self.surface, block=True)
+
+        return preload
 
     def keyspressed(self) -> typing.List[str]:
-        pressed_keys = []
-        keyboard_state = sdl2.SDL_GetKeyboardState(None)
+        return self.keyboard.pressed
 
-        for key_code in range(sdl2.SDL_NUM_SCANCODES):
-            if keyboard_state[key_code] == 1:
-                pressed_keys.append(chr_format_key_sdl2(sdl2.SDL_GetScancodeName(key_code)))
+    @property
+    def keyboard(self) -> kurses.interface.keyboard.KeyboardInterface:
+        if self.__keyboard is None:
+            self.__keyboard = kurses.backend.KeyboardInterface()
+            self.__keyboard.update()
 
-        return pressed_keys
+        return self.__keyboard
 
     def joystick(self):
+        if not self.__joystick_opened:
+            self.__joystick_opened = True
+            self.__joystick.open()
+
         return self.__joystick.inputs
 
     def mouse(self):
         return self.__mouse
 
+    def mouse_delta(self) -> typing.Tuple[int, int]:
+        return self.__mouse_delta
+
     @property
     def window(self) -> sdl2.SDL_Window:
         return self.__c_window
@@ -204,92 +592,160 @@ class SDL2VirtualTerminal(kurses.term.VirtualTerminal):
         return self.__c_renderer
 
     def push_events(self, event: sdl2.SDL_Event):
+        handler = self.__event_handlers.get(event.type, None)
+
+        if handler is not None:
+            handler(event)
+
+    def __poll_events(self):
+        events = self.__c_events
+        length = len(events)
+
+        sdl2.SDL_PumpEvents()
+
+        while True:
+            count = sdl2.SDL_PeepEvents(events, length, sdl2.SDL_GETEVENT, sdl2.SDL_FIRSTEVENT, sdl2.SDL_LASTEVENT)
+
+            for i in range(count):
+                self.push_events(events[i])
+
+            if count < length:
+                break
+
+    def __emit(self, name: str, *args):
+        if self.__batch is None:
+            self.__call(name, *args)
+        else:
+            self.__batch.append((name, args))
+
+    def __flush_events(self):
+        if self.__motion is not None:
+            self.__deliver_motion(*self.__motion)
+            self.__motion = None
+
+        if self.__scroll:
+            self.__emit("scroll", self.__scroll)
+            self.__scroll = 0
+
+        if self.__batch:
+            batch, self.__batch = self.__batch, []
+            self.__call("events", batch)
+
+    def __get_key_name(self, event: sdl2.SDL_Event) -> str:
+        sym = event.key.keysym.sym
+        name = self.__key_names.get(sym, None)
+
+        if name is None:
+            name = self.__key_names[sym] = chr_format_key_sdl2(sdl2.SDL_GetKeyName(sym))
+
+        return name
+
+    def __on_quit(self, event: sdl2.SDL_Event):
+        self.quit()
+        self.__call("exit")
+
+    def __on_window(self, event: sdl2.SDL_Event):
+        self.__exposed = True
+
+        if event.window.event == sdl2.SDL_WINDOWEVENT_RESIZED:
+            self.__on_resized(event.window.data1, event.window.data2)
+        elif event.window.event == sdl2.SDL_WINDOWEVENT_SIZE_CHANGED:
+            self.__size = event.window.data1, event.window.data2
+        elif event.window.event in self.__ALL_WINDOW_EVENTS:
+            self.__call(self.__ALL_WINDOW_EVENTS[event.window.event])
+
+    def __on_resized(self, width: int, height: int):
+        w, h = self.__font.size
+
+        sdl2.SDL_SetWindowSize(self.window, width, height)
+        self.__size = width, height
+
+        self.__call("resize", self.resizable)
+
+        if self.resizable:
+            for stream in self.streams:
+                if isinstance(stream, StreamBuffer):
+                    stream.resize(width // w, height // h)
+
+            if self.__bitmap:
+                self.__bitmap.resize(width, height)
+
+        self.__call("resize", self.resizable)
+
+    def __on_render_reset(self, event: sdl2.SDL_Event):
+        self.__exposed = True
+        self.__textures_font.clear(self.surface)
+
+    def __on_key_down(self, event: sdl2.SDL_Event):
+        self.__emit("key_down", self.__get_key_name(event))
+
+    def __on_key_up(self, event: sdl2.SDL_Event):
+        self.__emit("key_up", self.__get_key_name(event))
+
+    def __on_mouse_wheel(self, event: sdl2.SDL_Event):
+        if self.coalesce_events:
+            self.__scroll += event.wheel.y
+        else:
+            self.__emit("scroll", event.wheel.y)
+
+    def __on_mouse_motion(self, event: sdl2.SDL_Event):
+        motion = event.motion
+        dx, dy = self.__mouse_delta
+
+        self.__mouse_delta = dx + motion.xrel, dy + motion.yrel
+
+        if self.coalesce_events:
+            self.__motion = motion.state, motion.x, motion.y
+        else:
+            self.__deliver_motion(motion.state, motion.x, motion.y)
+
+    def __deliver_motion(self, buttons: int, px: int, py: int):
         width, height = self.size
         rows, cols = self.stream.shape
 
-        get_key_from_event = lambda e: chr_format_key_sdl2(sdl2.SDL_GetKeyName(e.key.keysym.sym))
-
-        if event.type == sdl2.SDL_QUIT:
-            self.quit()
-            self.__runtime.exit()
-        elif event.type == sdl2.SDL_WINDOWEVENT:
-            if event.window.event == sdl2.SDL_WINDOWEVENT_RESIZED:
-                width, height = event.window.data1, event.window.data2
-                w, h = self.__font.size
-
-                sdl2.SDL_SetWindowSize(self.window, width, height)
-
-                self.__runtime.resize(self.resizable)
-
-                if self.resizable:
-                    for stream in self.streams:
-                        if isinstance(stream, StreamBuffer):
-                            stream.resize(width // w, height // h)
-
-                    if self.__bitmap:
-                        self.__bitmap.resize(width, height)
-
-                self.__runtime.resize(self.resizable)
-            elif event.window.event == sdl2.SDL_WINDOWEVENT_MINIMIZED:
-                self.__runtime.minimized()
-            elif event.window.event == sdl2.SDL_WINDOWEVENT_SHOWN:
-                self.__runtime.showed()
-            elif event.window.event == sdl2.SDL_WINDOWEVENT_EXPOSED:
-                self.__runtime.exposed()
-            elif event.window.event == sdl2.SDL_WINDOWEVENT_RESTORED:
-                self.__runtime.restored()
-        elif event.type == sdl2.SDL_KEYDOWN:
-            self.__runtime.key_down(get_key_from_event(event))
-        elif event.type == sdl2.SDL_KEYUP:
-            self.__runtime.key_up(get_key_from_event(event))
-        elif event.type == sdl2.SDL_MOUSEWHEEL:
-            self.__runtime.scroll(event.wheel.y)
-        elif event.type == sdl2.SDL_MOUSEMOTION:
-            motion = event.motion
-
-            x, y = motion.x, motion.y
-            x, y = (math.ceil((x / width) * cols), math.ceil((y / height) * rows))
-
-            state = self.__ALL_NAME_CLICK_STATE[motion.state]
-
-            self.__mouse = state, (x, y), (motion.x, motion.y)
-            self.__runtime.mouse(state, (x, y), (motion.x, motion.y))
-        elif event.type == sdl2.SDL_SENSORUPDATE:
-            sensor_id = event.sensor.which
-
-            if sensor_id in self.__c_sensors:
-                data = event.sensor.data
-                s_type = self.__c_sensors[sensor_id]["type"]
-
-                if s_type == sdl2.SDL_SENSOR_ACCEL:
-                    self.__accelerometer = True, data
-                elif s_type == sdl2.SDL_SENSOR_GYRO:
-                    self.__gyroscope = True, data
-        elif event.type == sdl2.SDL_FINGERDOWN:
-            fid = event.tfinger.fingerId
+        x, y = (math.ceil((px / width) * cols), math.ceil((py / height) * rows))
 
-            self.__c_active_fingers[fid] = (event.tfinger.x, event.tfinger.y)
-        elif event.type == sdl2.SDL_FINGERMOTION:
-            fid = event.tfinger.fingerId
+        state = self.__ALL_NAME_CLICK_STATE[buttons]
+
+        self.__mouse = state, (x, y), (px, py)
+        self.__emit("mouse", state, (x, y), (px, py))
+
+    def __on_sensor_update(self, event: sdl2.SDL_Event):
+        sensor = self.__c_sensors.get(event.sensor.which, None)
 
-            if fid in self.__c_active_fingers:
-                self.__c_active_fingers[fid] = (event.tfinger.x, event.tfinger.y)
+        if sensor is None:
+            return
 
-        elif event.type == sdl2.SDL_FINGERUP:
-            fid = event.tfinger.fingerId
+        data = tuple(event.sensor.data[:3])
 
-            if fid in self.__c_active_fingers:
-                del self.__c_active_fingers[fid]
+        if sensor["type"] == sdl2.SDL_SENSOR_ACCEL:
+            self.__accelerometer = True, data
+        elif sensor["type"] == sdl2.SDL_SENSOR_GYRO:
+            self.__gyroscope = True, data
+
+    def __on_finger_down(self, event: sdl2.SDL_Event):
+        self.__c_active_fingers[event.tfinger.fingerId] = (event.tfinger.x, event.tfinger.y)
+
+    def __on_finger_motion(self, event: sdl2.SDL_Event):
+        fid = event.tfinger.fingerId
+
+        if fid in self.__c_active_fingers:
+            self.__c_active_fingers[fid] = (event.tfinger.x, event.tfinger.y)
+
+    def __on_finger_up(self, event: sdl2.SDL_Event):
+        self.__c_active_fingers.pop(event.tfinger.fingerId, None)
 
     def present(self):
         def _render_textures_font():
             self.__textures_font.present(self.surface)
             sdl2.SDL_RenderCopy(self.surface, self.__textures_font.current, None, None)
+            self.profiler.lap("texture")
 
         def _render_bitmap():
             if self.__bitmap:
                 self.__bitmap.present(self.surface)
                 sdl2.SDL_RenderCopy(self.surface, self.__bitmap.current, None, None)
+                self.profiler.lap("bitmap")
 
         render_order = [_render_textures_font, _render_bitmap]
 
@@ -302,19 +758,25 @@ class SDL2VirtualTerminal(kurses.term.VirtualTerminal):
     def draw(self):
         self.present()
         sdl2.SDL_RenderPresent(self.surface)
+        self.profiler.lap("present")
 
     def clean(self):
         sdl2.SDL_RenderClear(self.surface)
-        self.__textures_font.clear(self.surface)
 
     def purge(self):
         if self.__bitmap:
             self.__bitmap.clear(self.surface)
 
     def gyroscope(self) -> GyroscopeType:
+        if not self.__sensors_opened:
+            self.__open_sensors()
+
         return self.__gyroscope
 
     def accelerometer(self) -> AccelerometerType:
+        if not self.__sensors_opened:
+            self.__open_sensors()
+
         return self.__accelerometer
 
     def touch(self) -> typing.List[TouchType]:
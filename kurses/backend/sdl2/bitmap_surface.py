@@ -81,6 +81,7 @@ class SDL2BitmapSurface(kurses.surface.bitmap.BitmapSurface):
 
             if draw is not None:
                 draw(fig)
+                self._draw_calls += 1
 
         sdl2.SDL_SetRenderTarget(surface, None)
 
@@ -0,0 +1,20 @@
+import sdl2
+
+import kurses.clock
+
+
+class SDL2FrameClock(kurses.clock.FrameClock):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+
+        self.__frequency = sdl2.SDL_GetPerformanceFrequency()
+
+    def counter(self) -> int:
+        return sdl2.SDL_GetPerformanceCounter()
+
+    @property
+    def frequency(self) -> int:
+        return self.__frequency
+
+    def delay(self, seconds: float) -> None:
+        sdl2.SDL_Delay(int(seconds * 1000))
@@ -1,13 +1,15 @@
 import ctypes
-import functools
+import threading
 import typing
+import warnings
 
 import sdl2
 import sdl2.sdlttf
 
-import kurses.colors
 import kurses.font_resources
+from kurses.backend.sdl2.glyph_atlas import SDL2GlyphAtlas
 import kurses.stream
+import kurses.stream.attributes
 import kurses.term
 
 RenderMethodSDL2 = typing.Callable[[sdl2.sdlttf.TTF_Font, int, sdl2.SDL_Color, sdl2.SDL_Color], sdl2.SDL_Surface]
@@ -32,6 +34,13 @@ def cast_render_method(_render_method) -> RenderMethodSDL2:
     return inner
 
 
+def cast_alpha_render_method(_render_method) -> RenderMethodSDL2:
+    def inner(font, _chr, fg, bg):
+        return _render_method(font, _chr, fg)
+
+    return inner
+
+
 def cast_color_sdl2(color=(0, 0, 0)) -> sdl2.SDL_Color:
     return sdl2.SDL_Color(*color)
 
@@ -58,17 +67,19 @@ def create_texture_chr_sdl2(font: sdl2.sdlttf.TTF_Font, render_method: RenderMet
     return _texture
 
 
-def get_style_sdl2(chr_attr: kurses.stream.CharacterAttribute, all_styles: dict) -> int:
-    style = 0
+def get_style_sdl2(style: int, all_styles: dict) -> int:
+    _style = 0
 
     for _s in all_styles.keys():
-        if getattr(chr_attr, _s):
-            style |= all_styles[_s]
+        if style & _s:
+            _style |= all_styles[_s]
 
-    return style
+    return _style
 
 
 def get_size_surface_from_font(font: sdl2.sdlttf.TTF_Font, render_method: RenderMethodSDL2):
+    sdl2.sdlttf.TTF_SetFontStyle(font, sdl2.sdlttf.TTF_STYLE_NORMAL)
+
     _surface = render_method(font, ord(' '), cast_color_sdl2((0, 0, 0)), cast_color_sdl2((0, 0, 0)))
     size = get_size_from_surface_sdl2(_surface)
 
@@ -86,6 +97,70 @@ def get_size_textures_from_font(font: sdl2.sdlttf.TTF_Font, renderer: sdl2.SDL_R
     return size
 
 
+def get_underline_row_sdl2(font: sdl2.sdlttf.TTF_Font, style: int) -> int:
+    """
+    Get the first row of the underline of the font, SDL_ttf does not expose the underline position of the face so
+    the row is found in an underlined space.
+    """
+    sdl2.sdlttf.TTF_SetFontStyle(font, style | sdl2.sdlttf.TTF_STYLE_UNDERLINE)
+
+    _surface = sdl2.sdlttf.TTF_RenderText_Blended(font, b" ", cast_color_sdl2((255, 255, 255)))
+    _pixels = sdl2.SDL_ConvertSurfaceFormat(_surface, sdl2.SDL_PIXELFORMAT_ARGB8888, 0)
+    sdl2.SDL_FreeSurface(_surface)
+
+    w, h, pitch = _pixels.contents.w, _pixels.contents.h, _pixels.contents.pitch
+    data = ctypes.string_at(_pixels.contents.pixels, pitch * h)
+    sdl2.SDL_FreeSurface(_pixels)
+
+    sdl2.sdlttf.TTF_SetFontStyle(font, sdl2.sdlttf.TTF_STYLE_NORMAL)
+
+    for row in range(h):
+        if any(data[row * pitch + x * 4 + 3] for x in range(w)):
+            return row
+
+    return sdl2.sdlttf.TTF_FontAscent(font)
+
+
+def get_advances_sdl2(font: sdl2.sdlttf.TTF_Font, codes: typing.Iterable[int]) -> typing.Set[int]:
+    """
+    Get the distinct advances of the glyphs provided by the font.
+    """
+    advances = set()
+    advance = ctypes.c_int()
+
+    for code in codes:
+        if not sdl2.sdlttf.TTF_GlyphIsProvided(font, code):
+            continue
+
+        if sdl2.sdlttf.TTF_GlyphMetrics(font, code, None, None, None, None, ctypes.byref(advance)) == 0:
+            advances.add(advance.value)
+
+    return advances
+
+
+def get_metrics_sdl2(font: sdl2.sdlttf.TTF_Font, render_method: RenderMethodSDL2,
+                     style: int) -> kurses.font_resources.FontMetrics:
+    sdl2.sdlttf.TTF_SetFontStyle(font, style)
+
+    _surface = render_method(font, ord(' '), cast_color_sdl2((0, 0, 0)), cast_color_sdl2((0, 0, 0)))
+    advance, height = get_size_from_surface_sdl2(_surface)
+    sdl2.SDL_FreeSurface(_surface)
+
+    monospace = len(get_advances_sdl2(font, range(0x20, 0x7F))) <= 1
+
+    sdl2.sdlttf.TTF_SetFontStyle(font, sdl2.sdlttf.TTF_STYLE_NORMAL)
+
+    return kurses.font_resources.FontMetrics(
+        advance=advance,
+        height=height,
+        ascent=sdl2.sdlttf.TTF_FontAscent(font),
+        descent=sdl2.sdlttf.TTF_FontDescent(font),
+        line_skip=sdl2.sdlttf.TTF_FontLineSkip(font),
+        underline=get_underline_row_sdl2(font, style),
+        monospace=monospace,
+    )
+
+
 def get_render_font_method_sdl2(encoding: kurses.font_resources.EncodingFont,
                                 quality: kurses.font_resources.QualityFont, render_methods: dict) -> RenderMethodSDL2:
     render_method = render_methods[encoding][quality]
@@ -119,61 +194,324 @@ class SDL2FontResources(kurses.font_resources.FontResources):
         },
     }
 
+    __ALL_ATLAS_RENDER_METHODS_SDL2 = {
+        kurses.font_resources.EncodingFont.ASCII: {
+            kurses.font_resources.QualityFont.SOLID: cast_alpha_render_method(sdl2.sdlttf.TTF_RenderText_Solid),
+            kurses.font_resources.QualityFont.SHADED: cast_alpha_render_method(sdl2.sdlttf.TTF_RenderText_Blended),
+            kurses.font_resources.QualityFont.LCD: cast_alpha_render_method(sdl2.sdlttf.TTF_RenderText_Blended),
+            kurses.font_resources.QualityFont.BLENDED: cast_alpha_render_method(sdl2.sdlttf.TTF_RenderText_Blended)
+        },
+        kurses.font_resources.EncodingFont.UTF_8: {
+            kurses.font_resources.QualityFont.SOLID: cast_alpha_render_method(sdl2.sdlttf.TTF_RenderUTF8_Solid),
+            kurses.font_resources.QualityFont.SHADED: cast_alpha_render_method(sdl2.sdlttf.TTF_RenderUTF8_Blended),
+            kurses.font_resources.QualityFont.LCD: cast_alpha_render_method(sdl2.sdlttf.TTF_RenderUTF8_Blended),
+            kurses.font_resources.QualityFont.BLENDED: cast_alpha_render_method(sdl2.sdlttf.TTF_RenderUTF8_Blended)
+        },
+        kurses.font_resources.EncodingFont.UNICODE: {
+            kurses.font_resources.QualityFont.SOLID: cast_alpha_render_method(sdl2.sdlttf.TTF_RenderUNICODE_Solid),
+            kurses.font_resources.QualityFont.SHADED: cast_alpha_render_method(
+                sdl2.sdlttf.TTF_RenderUNICODE_Blended),
+            kurses.font_resources.QualityFont.LCD: cast_alpha_render_method(sdl2.sdlttf.TTF_RenderUNICODE_Blended),
+            kurses.font_resources.QualityFont.BLENDED: cast_alpha_render_method(
+                sdl2.sdlttf.TTF_RenderUNICODE_Blended)
+        },
+    }
+
     __ALL_FONT_STYLES = {
-        "bold": sdl2.sdlttf.TTF_STYLE_BOLD,
-        "italic": sdl2.sdlttf.TTF_STYLE_ITALIC,
-        "underline": sdl2.sdlttf.TTF_STYLE_UNDERLINE,
-        "strikethrough": sdl2.sdlttf.TTF_STYLE_STRIKETHROUGH,
+        kurses.stream.attributes.STYLE_BOLD: sdl2.sdlttf.TTF_STYLE_BOLD,
+        kurses.stream.attributes.STYLE_ITALIC: sdl2.sdlttf.TTF_STYLE_ITALIC,
+        kurses.stream.attributes.STYLE_UNDERLINE: sdl2.sdlttf.TTF_STYLE_UNDERLINE,
+        kurses.stream.attributes.STYLE_STRIKETHROUGH: sdl2.sdlttf.TTF_STYLE_STRIKETHROUGH,
     }
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
 
-        self.__c_font = sdl2.sdlttf.TTF_OpenFont(self.filename.encode(), ptsize=self.ptsize)
-
-        if self.__c_font is None:
-            raise FileNotFoundError("Font no found")
+        self.__c_font = self.__open_font()
 
         self.__default_render_method = lambda: get_render_font_method_sdl2(
             self.encoding, self.quality, self.__ALL_RENDER_METHODS_SDL2
         )
 
-        self.__size = get_size_surface_from_font(
-            self.__c_font, self.__default_render_method()
+        self.__atlas_render_method = get_render_font_method_sdl2(
+            self.encoding, self.quality, self.__ALL_ATLAS_RENDER_METHODS_SDL2
         )
+        self.__glyph_atlas = SDL2GlyphAtlas() if self.atlas else None
+        self.__glyph_store_loaded = False
+
+        self.__thread_fonts = threading.local()
+        self.__c_thread_fonts: typing.List[sdl2.sdlttf.TTF_Font] = []
+        self.__thread_fonts_lock = threading.Lock()
+
+        self.__metrics: typing.Dict[int, kurses.font_resources.FontMetrics] = {}
+        self.__size = self.metrics.cell
 
     def __del__(self):
+        self.cancel_preload()
         self.clean_cache()
+        self.__close_thread_fonts()
+
         sdl2.sdlttf.TTF_CloseFont(self.font)
 
+    def __open_font(self) -> sdl2.sdlttf.TTF_Font:
+        font = sdl2.sdlttf.TTF_OpenFont(self.filename.encode(), ptsize=self.ptsize)
+
+        if not font:
+            raise FileNotFoundError("Font no found")
+
+        return font
+
+    def __close_thread_fonts(self):
+        for font in self.__c_thread_fonts:
+            sdl2.sdlttf.TTF_CloseFont(font)
+
+        self.__c_thread_fonts = []
+        self.__thread_fonts = threading.local()
+
+    def reload(self) -> None:
+        self.clean_cache()
+        self.__close_thread_fonts()
+
+        sdl2.sdlttf.TTF_CloseFont(self.__c_font)
+        self.__c_font = self.__open_font()
+
+        self.__metrics = {}
+        self.__size = self.metrics.cell
+
+    def get_metrics(self, style: int = 0) -> kurses.font_resources.FontMetrics:
+        metrics = self.__metrics.get(style, None)
+
+        if metrics is None:
+            metrics = get_metrics_sdl2(
+                self.__c_font, self.__default_render_method(), get_style_sdl2(style, self.__ALL_FONT_STYLES)
+            )
+            self.__metrics[style] = metrics
+
+            if style == 0 and not metrics.monospace:
+                warnings.warn(f"The glyphs of the font {self.filename} have different advances, the characters are "
+                              f"drawn stretched into cells of {metrics.advance}x{metrics.height}.", UserWarning)
+
+        return metrics
+
     @property
     def size(self) -> typing.Tuple[int, int]:
-        self.__size = get_size_surface_from_font(
-            self.__c_font, self.__default_render_method()
-        )
-
         return self.__size
 
     @property
     def font(self) -> sdl2.sdlttf.TTF_Font:
         return self.__c_font
 
+    @property
+    def glyph_atlas(self) -> typing.Optional[SDL2GlyphAtlas]:
+        return self.__glyph_atlas
+
     def clean_cache(self):
-        for _, texture in self.allocate_textures.items():
-            sdl2.SDL_DestroyTexture(texture)
+        self.allocate_textures.clear()
+
+        if self.__glyph_atlas is not None:
+            self.__glyph_atlas.destroy()
+            self.__glyph_store_loaded = False
+
+    def __load_glyph_store(self, renderer: sdl2.SDL_Renderer):
+        """
+        Upload the glyphs of the persistent cache into the atlas, from the memory map (without copies).
+        """
+        self.__glyph_store_loaded = True
+
+        if self.glyph_store is None:
+            return
+
+        for key, (w, h, pitch, pixels) in self.glyph_store.load().items():
+            buffer = (ctypes.c_char * len(pixels)).from_buffer(pixels)
+            self.__glyph_atlas.insert_pixels(renderer, key, buffer, w, h, pitch)
+            del buffer
+
+    def __get_thread_font(self) -> sdl2.sdlttf.TTF_Font:
+        """
+        Get the font of the current thread, the fonts of SDL_ttf can not be shared between threads.
+        """
+        font = getattr(self.__thread_fonts, "font", None)
+
+        if font is None:
+            with self.__thread_fonts_lock:
+                font = self.__open_font()
+                self.__c_thread_fonts.append(font)
+
+            self.__thread_fonts.font = font
+
+        return font
+
+    def __render_glyph(self, font: sdl2.sdlttf.TTF_Font, key: int) -> sdl2.SDL_Surface:
+        code, fg, bg, style, _, _ = kurses.stream.attributes.unpack_cell_key(key)
+
+        sdl2.sdlttf.TTF_SetFontStyle(font, get_style_sdl2(style, self.__ALL_FONT_STYLES))
+
+        if self.__glyph_atlas is None:
+            return self.__default_render_method()(
+                font, code,
+                cast_color_sdl2(self.get_depth_color(fg)),
+                cast_color_sdl2(self.get_depth_color(bg))
+            )
+
+        white = cast_color_sdl2((255, 255, 255))
+        _surface = self.__atlas_render_method(font, code, white, white)
+
+        if not _surface:
+            return _surface
+
+        _pixels = sdl2.SDL_ConvertSurfaceFormat(_surface, sdl2.SDL_PIXELFORMAT_ARGB8888, 0)
+        sdl2.SDL_FreeSurface(_surface)
+
+        return _pixels
+
+    def is_glyph_cached(self, key: int) -> bool:
+        if self.__glyph_atlas is None:
+            return key in self.allocate_textures
+
+        return key in self.__glyph_atlas or (
+                not self.__glyph_store_loaded and self.glyph_store is not None and key in self.glyph_store)
+
+    def rasterize_glyph(self, key: int) -> sdl2.SDL_Surface:
+        glyph = self.__render_glyph(self.__get_thread_font(), key)
+
+        # The preload counts the glyph as done when the render fails.
+        if not glyph:
+            raise RuntimeError(f"The glyph could not be rendered: {sdl2.sdlttf.TTF_GetError().decode()}")
+
+        return glyph
+
+    def upload_glyph(self, surface: sdl2.SDL_Renderer, key: int, glyph: sdl2.SDL_Surface) -> None:
+        if not glyph:
+            return
+
+        if self.__glyph_atlas is None:
+            texture = sdl2.SDL_CreateTextureFromSurface(surface, glyph)
+            sdl2.SDL_FreeSurface(glyph)
+
+            if texture:
+                self.allocate_textures[key] = texture
+
+            return
+
+        if not self.__glyph_store_loaded:
+            self.__load_glyph_store(surface)
+
+        w, h, pitch = glyph.contents.w, glyph.contents.h, glyph.contents.pitch
 
-    def present_chr(self, surface: sdl2.SDL_Renderer, _chr: kurses.stream.CharacterAttribute) -> sdl2.SDL_Renderer:
-        _cast_depth_colors = functools.partial(kurses.colors.cast_depth_colors, bits=self.depth_colors)
-        _get_style_sdl2 = functools.partial(get_style_sdl2, all_styles=self.__ALL_FONT_STYLES)
+        self.__glyph_atlas.insert_pixels(surface, key, glyph.contents.pixels, w, h, pitch)
 
-        if _chr not in self.allocate_textures:
-            self.allocate_textures[_chr] = create_texture_chr_sdl2(
+        if self.glyph_store is not None:
+            self.glyph_store.add(key, w, h, pitch, ctypes.string_at(glyph.contents.pixels, pitch * h))
+
+        sdl2.SDL_FreeSurface(glyph)
+
+    def release_glyph(self, glyph: sdl2.SDL_Surface) -> None:
+        sdl2.SDL_FreeSurface(glyph)
+
+    def present_chr(self, surface: sdl2.SDL_Renderer,
+                    _chr: kurses.stream.attributes.CharacterAttribute) -> typing.Optional[sdl2.SDL_Texture]:
+        texture = self.allocate_textures.get(_chr.key)
+
+        if texture is None and self.reserve_raster():
+            code, fg, bg, style, _, _ = kurses.stream.attributes.unpack_cell_key(_chr.key)
+
+            texture = create_texture_chr_sdl2(
                 self.font, self.__default_render_method(),
                 surface,
-                _chr.code,
-                _cast_depth_colors(_chr.foreign),
-                _cast_depth_colors(_chr.background),
-                _get_style_sdl2(_chr)
+                code,
+                self.get_depth_color(fg),
+                self.get_depth_color(bg),
+                get_style_sdl2(style, self.__ALL_FONT_STYLES)
             )
 
-        return self.allocate_textures[_chr]
+            self.allocate_textures[_chr.key] = texture
+
+        return texture
+
+    def destroy_texture(self, texture: sdl2.SDL_Texture) -> None:
+        sdl2.SDL_DestroyTexture(texture)
+
+    def get_texture_bytes(self, texture: sdl2.SDL_Texture) -> int:
+        w, h = get_size_from_texture_sdl2(texture)
+
+        return w * h * 4
+
+    def present_glyph(self, surface: sdl2.SDL_Renderer, _chr: kurses.stream.attributes.CharacterAttribute) -> typing.Optional[
+        typing.Tuple[sdl2.SDL_Texture, sdl2.SDL_Rect]]:
+        """
+        Get the page and the source rect of the glyph (character and style) in the atlas, rasterized in white.
+
+        :param surface: Renderer.
+        :param _chr: Character attribute.
+        :return: typing.Tuple[sdl2.SDL_Texture, sdl2.SDL_Rect], None if the raster budget of the frame is exhausted.
+        """
+        key = _chr.key & kurses.stream.attributes.CELL_KEY_GLYPH_MASK
+
+        if not self.__glyph_store_loaded:
+            self.__load_glyph_store(surface)
+
+        glyph = self.__glyph_atlas.get(key)
+
+        if glyph is None and self.reserve_raster():
+            self.upload_glyph(surface, key, self.__render_glyph(self.font, key))
+            glyph = self.__glyph_atlas.get(key)
+
+        return glyph
+
+    def __draw_atlas_glyph(self, surface: sdl2.SDL_Renderer, glyph: typing.Tuple[sdl2.SDL_Texture, sdl2.SDL_Rect],
+                           _chr: kurses.stream.attributes.CharacterAttribute, d_rect: sdl2.SDL_Rect):
+        page, s_rect = glyph
+
+        sdl2.SDL_SetRenderDrawColor(surface, *self.get_depth_color(_chr.background), 255)
+        sdl2.SDL_RenderFillRect(surface, d_rect)
+
+        sdl2.SDL_SetTextureColorMod(page, *self.get_depth_color(_chr.foreign))
+        sdl2.SDL_RenderCopy(surface, page, s_rect, d_rect)
+        self._draw_calls += 2
+
+    def __draw_placeholder(self, surface: sdl2.SDL_Renderer, _chr: kurses.stream.attributes.CharacterAttribute,
+                           d_rect: sdl2.SDL_Rect):
+        """
+        Draw the glyph of plain style (if it is in the cache) or the background of a deferred character.
+        """
+        attributes = kurses.stream.attributes
+        plain = _chr.key & ~(attributes.CELL_KEY_STYLE_MASK << attributes.CELL_KEY_STYLE_SHIFT)
+
+        if plain != _chr.key:
+            if self.__glyph_atlas is None:
+                if plain in self.allocate_textures:
+                    sdl2.SDL_RenderCopy(surface, self.allocate_textures.get(plain), None, d_rect)
+                    self._draw_calls += 1
+                    return
+            elif plain & attributes.CELL_KEY_GLYPH_MASK in self.__glyph_atlas:
+                glyph = self.__glyph_atlas[plain & attributes.CELL_KEY_GLYPH_MASK]
+                self.__draw_atlas_glyph(surface, glyph, _chr, d_rect)
+                return
+
+        sdl2.SDL_SetRenderDrawColor(surface, *self.get_depth_color(_chr.background), 255)
+        sdl2.SDL_RenderFillRect(surface, d_rect)
+        self._draw_calls += 1
+
+    def draw_chr(self, surface: sdl2.SDL_Renderer, _chr: kurses.stream.attributes.CharacterAttribute,
+                 rect: typing.Tuple[int, int, int, int]) -> bool:
+        d_rect = sdl2.SDL_Rect(*rect)
+
+        if self.__glyph_atlas is None:
+            texture = self.present_chr(surface, _chr)
+
+            if texture is None:
+                self.__draw_placeholder(surface, _chr, d_rect)
+                return False
+
+            sdl2.SDL_RenderCopy(surface, texture, None, d_rect)
+            self._draw_calls += 1
+            return True
+
+        glyph = self.present_glyph(surface, _chr)
+
+        if glyph is None:
+            self.__draw_placeholder(surface, _chr, d_rect)
+            return False
+
+        self.__draw_atlas_glyph(surface, glyph, _chr, d_rect)
+        return True
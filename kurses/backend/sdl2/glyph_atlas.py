@@ -0,0 +1,161 @@
+import ctypes
+import typing
+
+import sdl2
+
+GlyphKey = typing.Hashable
+GlyphType = typing.Tuple[sdl2.SDL_Texture, sdl2.SDL_Rect]
+
+DEFAULT_PAGE_SIZE = 1024, 1024
+
+
+class SDL2GlyphAtlas:
+    """
+    Texture atlas of glyphs, the glyphs are packed in rows (shelves) into pages of the same size.
+    """
+
+    __PADDING = 1
+
+    def __init__(self, page_size: typing.Tuple[int, int] = DEFAULT_PAGE_SIZE):
+        self.__page_size = page_size
+        self.__c_pages: typing.List[sdl2.SDL_Texture] = []
+        self.__glyphs: typing.Dict[GlyphKey, GlyphType] = {}
+        self.__shelf_x = 0
+        self.__shelf_y = 0
+        self.__shelf_height = 0
+        self.__hits = 0
+        self.__misses = 0
+
+    def __del__(self):
+        self.destroy()
+
+    def __contains__(self, key: GlyphKey) -> bool:
+        return key in self.__glyphs
+
+    def __getitem__(self, key: GlyphKey) -> GlyphType:
+        return self.__glyphs[key]
+
+    def __len__(self) -> int:
+        return len(self.__glyphs)
+
+    def get(self, key: GlyphKey) -> typing.Optional[GlyphType]:
+        """
+        Get glyph of atlas, counting the hit or the miss.
+
+        :param key: Key of glyph.
+        :return: typing.Optional[GlyphType]
+        """
+        glyph = self.__glyphs.get(key, None)
+
+        if glyph is None:
+            self.__misses += 1
+        else:
+            self.__hits += 1
+
+        return glyph
+
+    @property
+    def hits(self) -> int:
+        return self.__hits
+
+    @property
+    def misses(self) -> int:
+        return self.__misses
+
+    @property
+    def resident_bytes(self) -> int:
+        width, height = self.__page_size
+
+        return len(self.__c_pages) * width * height * 4
+
+    @property
+    def pages(self) -> typing.List[sdl2.SDL_Texture]:
+        return self.__c_pages
+
+    @property
+    def page_size(self) -> typing.Tuple[int, int]:
+        return self.__page_size
+
+    def destroy(self):
+        for page in self.__c_pages:
+            sdl2.SDL_DestroyTexture(page)
+
+        self.__c_pages = []
+        self.__glyphs = {}
+        self.__shelf_x, self.__shelf_y, self.__shelf_height = 0, 0, 0
+
+    def __create_page(self, renderer: sdl2.SDL_Renderer):
+        width, height = self.__page_size
+
+        page = sdl2.SDL_CreateTexture(
+            renderer, sdl2.SDL_PIXELFORMAT_ARGB8888, sdl2.SDL_TEXTUREACCESS_STATIC, width, height
+        )
+
+        empty = ctypes.create_string_buffer(width * height * 4)
+        sdl2.SDL_UpdateTexture(page, None, empty, width * 4)
+        sdl2.SDL_SetTextureBlendMode(page, sdl2.SDL_BLENDMODE_BLEND)
+
+        self.__c_pages.append(page)
+        self.__shelf_x, self.__shelf_y, self.__shelf_height = 0, 0, 0
+
+    def __allocate(self, renderer: sdl2.SDL_Renderer, w: int, h: int) -> typing.Tuple[sdl2.SDL_Texture, int, int]:
+        width, height = self.__page_size
+
+        if w > width or h > height:
+            raise ValueError(f"The glyph ({w}x{h}) is bigger than the page of the atlas ({width}x{height})")
+
+        if self.__shelf_x + w > width:
+            self.__shelf_x = 0
+            self.__shelf_y += self.__shelf_height + self.__PADDING
+            self.__shelf_height = 0
+
+        if not self.__c_pages or self.__shelf_y + h > height:
+            self.__create_page(renderer)
+
+        x, y = self.__shelf_x, self.__shelf_y
+
+        self.__shelf_x += w + self.__PADDING
+        self.__shelf_height = max(self.__shelf_height, h)
+
+        return self.__c_pages[-1], x, y
+
+    def insert(self, renderer: sdl2.SDL_Renderer, key: GlyphKey, surface: sdl2.SDL_Surface) -> GlyphType:
+        """
+        Upload the glyph surface into the atlas.
+
+        :param renderer: Renderer owner of the pages.
+        :param key: Key of glyph.
+        :param surface: Surface of glyph, the surface is not released.
+        :return: GlyphType
+        """
+        _surface = sdl2.SDL_ConvertSurfaceFormat(surface, sdl2.SDL_PIXELFORMAT_ARGB8888, 0)
+
+        glyph = self.insert_pixels(
+            renderer, key, _surface.contents.pixels, _surface.contents.w, _surface.contents.h, _surface.contents.pitch
+        )
+
+        sdl2.SDL_FreeSurface(_surface)
+
+        return glyph
+
+    def insert_pixels(self, renderer: sdl2.SDL_Renderer, key: GlyphKey, pixels: typing.Any, w: int, h: int,
+                      pitch: int) -> GlyphType:
+        """
+        Upload the pixels (ARGB8888) of the glyph into the atlas.
+
+        :param renderer: Renderer owner of the pages.
+        :param key: Key of glyph.
+        :param pixels: Pointer to the pixels.
+        :param w: Width of glyph.
+        :param h: Height of glyph.
+        :param pitch: Bytes per row.
+        :return: GlyphType
+        """
+        page, x, y = self.__allocate(renderer, w, h)
+        s_rect = sdl2.SDL_Rect(x, y, w, h)
+
+        sdl2.SDL_UpdateTexture(page, s_rect, pixels, pitch)
+
+        self.__glyphs[key] = page, s_rect
+
+        return page, s_rect
@@ -0,0 +1,103 @@
+import ctypes
+import typing
+
+import sdl2
+
+from kurses.backend.sdl2 import SDL2VirtualTerminal
+
+if typing.TYPE_CHECKING:
+    import numpy as np
+
+
+class SDL2HeadlessTerminal(SDL2VirtualTerminal):
+    """
+    Virtual terminal without window, the terminal is drawn by the software renderer of SDL2 into a framebuffer in
+    memory (RGBA), for the servers without display, the snapshots and the benchmarks.
+
+    The frames per second are not limited by default, and the main loop can run a number of frames:
+
+        term = SDL2HeadlessTerminal("font.ttf", size=(640, 480))
+        term.stream.print("Hello world")
+        term.main_loop(frames=1)
+        pixels = term.frame()
+    """
+
+    def __init__(self, *args, **kwargs):
+        if sdl2.SDL_WasInit(sdl2.SDL_INIT_EVERYTHING) == 0:
+            sdl2.SDL_SetHintWithPriority(sdl2.SDL_HINT_VIDEODRIVER, b"dummy", sdl2.SDL_HINT_DEFAULT)
+            sdl2.SDL_SetHintWithPriority(sdl2.SDL_HINT_AUDIODRIVER, b"dummy", sdl2.SDL_HINT_DEFAULT)
+
+        kwargs.setdefault("fps", 0)
+
+        self.__c_surface = None
+        self.__title = kwargs.get("title", "Virtual terminal")
+
+        super().__init__(*args, **kwargs)
+
+    def __del__(self):
+        super().__del__()
+
+        if self.__c_surface is not None:
+            sdl2.SDL_FreeSurface(self.__c_surface)
+            self.__c_surface = None
+
+    def _create_window(self, width: int, height: int, **kwargs) -> typing.Optional[sdl2.SDL_Window]:
+        self.__c_surface = sdl2.SDL_CreateRGBSurfaceWithFormat(0, width, height, 32, sdl2.SDL_PIXELFORMAT_RGBA32)
+
+        if not self.__c_surface:
+            raise RuntimeError(f"Failed to create the framebuffer: {sdl2.SDL_GetError().decode()}")
+
+        return None
+
+    def _create_renderer(self, window: typing.Optional[sdl2.SDL_Window]) -> sdl2.SDL_Renderer:
+        return sdl2.SDL_CreateSoftwareRenderer(self.__c_surface)
+
+    @property
+    def title(self):
+        return self.__title
+
+    @title.setter
+    def title(self, _str: str):
+        self.__title = _str
+
+    @property
+    def size(self) -> typing.Tuple[int, int]:
+        return self.__c_surface.contents.w, self.__c_surface.contents.h
+
+    @property
+    def resizable_window(self) -> bool:
+        return False
+
+    @resizable_window.setter
+    def resizable_window(self, resizable: bool):
+        pass
+
+    @property
+    def framebuffer(self) -> sdl2.SDL_Surface:
+        return self.__c_surface
+
+    def frame(self) -> "np.ndarray":
+        """
+        Get a copy of the last frame drawn.
+
+        :return: np.ndarray with shape (height, width, 4) and the channels RGBA.
+        """
+        import numpy as np
+
+        surface = self.__c_surface.contents
+        width, height, pitch = surface.w, surface.h, surface.pitch
+
+        pixels = ctypes.cast(surface.pixels, ctypes.POINTER(ctypes.c_uint8 * (pitch * height))).contents
+        rows = np.frombuffer(pixels, dtype=np.uint8).reshape(height, pitch)
+
+        return rows[:, :width * 4].reshape(height, width, 4).copy()
+
+    def save(self, filename: str):
+        """
+        Save the last frame drawn as BMP.
+
+        :param filename: Filename of image.
+        :return: None
+        """
+        if sdl2.SDL_SaveBMP(self.__c_surface, filename.encode()) != 0:
+            raise RuntimeError(f"Failed to save the frame: {sdl2.SDL_GetError().decode()}")
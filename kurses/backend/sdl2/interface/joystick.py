@@ -26,6 +26,9 @@ class SDL2JoystickInterface(JoystickInterface):
         self.close()
 
     def open(self):
+        if sdl2.SDL_WasInit(sdl2.SDL_INIT_GAMECONTROLLER) == 0:
+            sdl2.SDL_InitSubSystem(sdl2.SDL_INIT_GAMECONTROLLER)
+
         n_joystick = sdl2.SDL_NumJoysticks()
 
         for i in range(n_joystick):
@@ -0,0 +1,75 @@
+import ctypes
+import typing
+
+import numpy as np
+import sdl2
+
+from kurses.interface.keyboard import KeyboardInterface
+
+
+def get_scancode_names_sdl2() -> typing.List[str]:
+    return [sdl2.SDL_GetScancodeName(scancode).decode().lower() for scancode in range(sdl2.SDL_NUM_SCANCODES)]
+
+
+class SDL2KeyboardInterface(KeyboardInterface):
+    """
+    Keyboard snapshot over the state of SDL_GetKeyboardState (as NumPy view), the names of the scancodes are computed
+    once.
+    """
+
+    def __init__(self):
+        numkeys = ctypes.c_int(0)
+        state = sdl2.SDL_GetKeyboardState(ctypes.byref(numkeys))
+
+        self.__state = np.ctypeslib.as_array(state, shape=(numkeys.value,))
+        self.__current = np.zeros(numkeys.value, dtype=np.uint8)
+        self.__previous = self.__current.copy()
+        self.__pressed: typing.Optional[typing.List[str]] = None
+
+        self.__names = get_scancode_names_sdl2()[:numkeys.value]
+        self.__scancodes: typing.Dict[str, int] = {}
+
+        for scancode, name in enumerate(self.__names):
+            if name:
+                self.__scancodes.setdefault(name, scancode)
+
+    @property
+    def names(self) -> typing.List[str]:
+        """
+        Get the names of the keys, indexed by scancode.
+
+        :return: typing.List[str]
+        """
+        return self.__names
+
+    @property
+    def scancodes(self) -> typing.Dict[str, int]:
+        return self.__scancodes
+
+    def update(self):
+        self.__previous, self.__current = self.__current, self.__previous
+        np.copyto(self.__current, self.__state)
+        self.__pressed = None
+
+    def is_pressed(self, name: str) -> bool:
+        scancode = self.__scancodes.get(name, None)
+
+        return scancode is not None and bool(self.__current[scancode])
+
+    def __get_names(self, keys: np.ndarray) -> typing.List[str]:
+        return [self.__names[scancode] for scancode in np.flatnonzero(keys).tolist() if self.__names[scancode]]
+
+    @property
+    def pressed(self) -> typing.List[str]:
+        if self.__pressed is None:
+            self.__pressed = self.__get_names(self.__current)
+
+        return list(self.__pressed)
+
+    @property
+    def just_pressed(self) -> typing.Set[str]:
+        return set(self.__get_names(self.__current > self.__previous))
+
+    @property
+    def just_released(self) -> typing.Set[str]:
+        return set(self.__get_names(self.__current < self.__previous))
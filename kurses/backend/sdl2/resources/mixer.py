@@ -90,6 +90,9 @@ class SDL2Buzzer(Buzzer):
             samples=2048
         )
 
+        if sdl2.SDL_WasInit(sdl2.SDL_INIT_AUDIO) == 0:
+            sdl2.SDL_InitSubSystem(sdl2.SDL_INIT_AUDIO)
+
         self.device_id = sdl2.SDL_OpenAudioDevice(None, 0, self.spec, None, 0)
         if self.device_id == 0:
             raise RuntimeError(f"The audio device could not be opened: {sdl2.SDL_GetError()}")
@@ -156,6 +159,10 @@ class SDL2Buzzer(Buzzer):
         sdl2.SDL_QueueAudio(self.device_id, raw_data, len(raw_data))
         sdl2.SDL_PauseAudioDevice(self.device_id, 0)
 
-    def __del__(self):
-        if hasattr(self, 'device_id') and self.device_id:
+    def close(self):
+        if getattr(self, 'device_id', 0):
             sdl2.SDL_CloseAudioDevice(self.device_id)
+            self.device_id = 0
+
+    def __del__(self):
+        self.close()
@@ -4,14 +4,63 @@ import sdl2
 
 import kurses.font_resources
 import kurses.stream
+import kurses.stream.attributes
 import kurses.surface.texture
 
+RectType = typing.Tuple[int, int, int, int]
+
+
+def get_spans_from_cells(cells: typing.Iterable[typing.Tuple[int, int]]) -> typing.Generator[RectType, None, None]:
+    """
+    Merge the cells (sorted by rows) that are next to each other in the same row.
+
+    :param cells: Positions (x and y) of the cells, sorted by rows.
+    :return: typing.Generator[RectType, None, None] with x, y, w, h in cells.
+    """
+    span = None
+
+    for x, y in cells:
+        if span is not None and span[1] == y and span[0] + span[2] == x:
+            span = span[0], y, span[2] + 1, 1
+            continue
+
+        if span is not None:
+            yield span
+
+        span = x, y, 1, 1
+
+    if span is not None:
+        yield span
+
+
+def intersect_rect(a: RectType, b: RectType) -> bool:
+    ax, ay, aw, ah = a
+    bx, by, bw, bh = b
+
+    return ax < bx + bw and bx < ax + aw and ay < by + bh and by < ay + ah
+
+
+def clip_rect(a: RectType, b: RectType) -> typing.Optional[RectType]:
+    ax, ay, aw, ah = a
+    bx, by, bw, bh = b
+    x0, y0, x1, y1 = max(ax, bx), max(ay, by), min(ax + aw, bx + bw), min(ay + ah, by + bh)
+
+    if x0 >= x1 or y0 >= y1:
+        return None
+
+    return x0, y0, x1 - x0, y1 - y0
+
 
 class SDL2TextureSurface(kurses.surface.texture.TextureSurface):
     def __init__(self, font: kurses.font_resources.FontResources, streams: typing.List[kurses.stream.StreamBuffer]):
         super().__init__(font, streams)
 
         self.__dst_texture = None
+        self.__scratch_texture = None
+        self.__dst_size = 0, 0
+        self.__layout = None
+        self.__frames: typing.List[typing.Tuple[typing.Any, typing.List[typing.Tuple[RectType, typing.Any]]]] = []
+        self.__deferred: typing.List[typing.Set[typing.Tuple[int, int]]] = []
 
     def __del__(self):
         self.destroy()
@@ -20,6 +69,14 @@ class SDL2TextureSurface(kurses.surface.texture.TextureSurface):
         if self.current is not None:
             sdl2.SDL_DestroyTexture(self.current)
 
+        if self.__scratch_texture is not None:
+            sdl2.SDL_DestroyTexture(self.__scratch_texture)
+
+        self.__dst_texture = None
+        self.__scratch_texture = None
+        self.__layout = None
+        self.__deferred = []
+
     def create(self, surface: sdl2.SDL_Renderer):
         width, height = self.size
 
@@ -28,41 +85,251 @@ class SDL2TextureSurface(kurses.surface.texture.TextureSurface):
         self.__dst_texture = sdl2.SDL_CreateTexture(
             surface, sdl2.SDL_PIXELFORMAT_RGBA8888, sdl2.SDL_TEXTUREACCESS_TARGET, width, height
         )
+        self.__dst_size = width, height
 
-    def present(self, surface: sdl2.SDL_Renderer) -> sdl2.SDL_Texture:
-        w, h = self.font.size
+    def __get_layout(self):
+        return self.font.size, tuple((stream.uid, stream.sx, stream.sy, stream.shape) for stream in self.streams)
 
-        self.create(surface)
+    def __draw_chr(self, surface: sdl2.SDL_Renderer, _data: kurses.stream.attributes.CharacterAttribute, w: int, h: int,
+                   sx: int, sy: int) -> bool:
+        x, y = _data.position
 
-        sdl2.SDL_SetRenderTarget(surface, self.current)
+        return self.font.draw_chr(surface, _data, (x * (w * sx), y * (h * sy), w * sx, h * sy))
+
+    @staticmethod
+    def __get_rect_area(_data: kurses.stream.attributes.RectangleAttribute, w: int, h: int, sx: int, sy: int) -> RectType:
+        x, y = _data.position
+
+        return x, y, (_data.w * w) * sx, (_data.h * h) * sy
+
+    def __draw_rect(self, surface: sdl2.SDL_Renderer, _data: kurses.stream.attributes.RectangleAttribute, w: int, h: int,
+                    sx: int, sy: int):
+        d_rect = sdl2.SDL_Rect(*self.__get_rect_area(_data, w, h, sx, sy))
+
+        sdl2.SDL_SetRenderDrawColor(surface, *_data.color, 255)
+        sdl2.SDL_RenderFillRect(surface, d_rect)
+        self._draw_calls += 1
+
+    def __present_all(self, surface: sdl2.SDL_Renderer, w: int, h: int):
+        self.__frames = []
+        self.__deferred = []
+
+        sdl2.SDL_SetRenderDrawColor(surface, 0, 0, 0, 0)
+        sdl2.SDL_RenderClear(surface)
 
         for stream in self.streams:
+            deferred = set()
+            sx, sy = stream.sx, stream.sy
+            matrix = stream.buffer
+
+            stream.pop_scrolls()
+
+            state, _ = matrix.diff(None)
+            rectangles = matrix.rectangles()
+
+            for _data in rectangles:
+                self.__draw_rect(surface, _data, w, h, sx, sy)
+
+            for _data in matrix:
+                if isinstance(_data, kurses.stream.attributes.CharacterAttribute):
+                    if not self.__draw_chr(surface, _data, w, h, sx, sy):
+                        deferred.add(_data.position)
+
+            self.__deferred.append(deferred)
+            self.__frames.append((state, [(self.__get_rect_area(_data, w, h, sx, sy), _data.color) for _data in
+                                          rectangles]))
+
+    def __present_damage(self, surface: sdl2.SDL_Renderer, w: int, h: int):
+        damage: typing.List[RectType] = []
+        matrices = []
+        frames = []
+
+        for i, (stream, (previous, previous_rects), deferred) in enumerate(zip(self.streams, self.__frames,
+                                                                              self.__deferred)):
             sx, sy = stream.sx, stream.sy
+            matrix = stream.buffer
+
+            for scroll in stream.pop_scrolls():
+                previous = self.__scroll(surface, i, scroll, matrix, previous, previous_rects, deferred, damage, w, h)
 
-            for _data in stream.buffer:
-                x, y = _data.position
+            state, changed = matrix.diff(previous)
+            rectangles = matrix.rectangles()
+            rects = [(self.__get_rect_area(_data, w, h, sx, sy), tuple(_data.color)) for _data in rectangles]
 
-                if isinstance(_data, kurses.stream.CharacterAttribute):
-                    texture = self.font.present_chr(surface, _data)
+            if rects != previous_rects:
+                damage.extend(area for area, _ in set(rects).symmetric_difference(previous_rects))
 
-                    d_rect = sdl2.SDL_Rect(x * (w * sx), y * (h * sy), w * sx, h * sy)
-                    sdl2.SDL_RenderCopy(surface, texture, None, d_rect)
+            if deferred:
+                changed = sorted(set(changed).union(deferred), key=lambda position: (position[1], position[0]))
 
-                elif isinstance(_data, kurses.stream.RectangleAttribute):
-                    d_rect = sdl2.SDL_Rect(x, y, (_data.w * w) * sx, (_data.h * h) * sy)
+            for x, y, cw, ch in get_spans_from_cells(changed):
+                damage.append((x * w * sx, y * h * sy, cw * w * sx, ch * h * sy))
+
+            matrices.append((matrix, rectangles, rects, sx, sy))
+            frames.append((state, rects))
+
+        self.__frames = frames
+        self.__deferred = [set() for _ in matrices]
+
+        for area in damage:
+            dx, dy, dw, dh = area
+            clip = sdl2.SDL_Rect(dx, dy, dw, dh)
+
+            sdl2.SDL_RenderSetClipRect(surface, clip)
+            sdl2.SDL_SetRenderDrawColor(surface, 0, 0, 0, 0)
+            sdl2.SDL_RenderFillRect(surface, clip)
+            self._draw_calls += 1
 
-                    sdl2.SDL_SetRenderDrawColor(surface, *_data.color, 255)
-                    sdl2.SDL_RenderFillRect(surface, d_rect)
+            for (matrix, rectangles, rects, sx, sy), deferred in zip(matrices, self.__deferred):
+                for _data, (rect, _) in zip(rectangles, rects):
+                    if intersect_rect(area, rect):
+                        self.__draw_rect(surface, _data, w, h, sx, sy)
+
+                rows, cols = matrix.shape
+                cw, ch = w * sx, h * sy
+
+                for y in range(max(dy // ch, 0), min(-(-(dy + dh) // ch), rows)):
+                    for x in range(max(dx // cw, 0), min(-(-(dx + dw) // cw), cols)):
+                        _data = matrix[x, y]
+
+                        if isinstance(_data, kurses.stream.attributes.CharacterAttribute):
+                            if self.__draw_chr(surface, _data, w, h, sx, sy):
+                                deferred.discard(_data.position)
+                            else:
+                                deferred.add(_data.position)
+
+        sdl2.SDL_RenderSetClipRect(surface, None)
+
+    def __move_pixels(self, surface: sdl2.SDL_Renderer, src: RectType, dst: RectType):
+        """
+        Copy pixels of the texture into other place of the texture, through a scratch texture because a texture can
+        not be the source and the target of a copy.
+        """
+        if self.__scratch_texture is None:
+            width, height = self.__dst_size
+
+            self.__scratch_texture = sdl2.SDL_CreateTexture(
+                surface, sdl2.SDL_PIXELFORMAT_RGBA8888, sdl2.SDL_TEXTUREACCESS_TARGET, width, height
+            )
+            sdl2.SDL_SetTextureBlendMode(self.__scratch_texture, sdl2.SDL_BLENDMODE_NONE)
+
+        blend_mode = sdl2.SDL_BlendMode()
+        sdl2.SDL_GetTextureBlendMode(self.current, blend_mode)
+        sdl2.SDL_SetTextureBlendMode(self.current, sdl2.SDL_BLENDMODE_NONE)
+
+        s_rect, d_rect = sdl2.SDL_Rect(*src), sdl2.SDL_Rect(*dst)
+
+        sdl2.SDL_SetRenderTarget(surface, self.__scratch_texture)
+        sdl2.SDL_RenderCopy(surface, self.current, s_rect, s_rect)
+        sdl2.SDL_SetRenderTarget(surface, self.current)
+        sdl2.SDL_RenderCopy(surface, self.__scratch_texture, s_rect, d_rect)
+
+        sdl2.SDL_SetTextureBlendMode(self.current, blend_mode)
+        self._draw_calls += 2
+
+    def __scroll(self, surface: sdl2.SDL_Renderer, index: int, scroll: kurses.stream.ScrollType, matrix, previous,
+                 previous_rects: typing.List[typing.Tuple[RectType, typing.Any]],
+                 deferred: typing.Set[typing.Tuple[int, int]], damage: typing.List[RectType], w: int, h: int):
+        """
+        Scroll the rows already drawn of a stream, moving the pixels in the texture and the state of the last frame, so
+        the diff only finds the rows uncovered. The areas of the other streams and of the rectangles in the region are
+        damaged, because their pixels are moved too.
+        """
+        top, bottom, lines = scroll
+        stream = self.streams[index]
+        rows, cols = matrix.shape
+        cw, ch = w * stream.sx, h * stream.sy
+
+        top, bottom = max(top, 0), min(bottom, rows)
+        count = min(abs(lines), bottom - top)
+
+        if count <= 0:
+            return previous
+
+        region = 0, top * ch, cols * cw, (bottom - top) * ch
+        offset = -count * ch if lines > 0 else count * ch
+
+        if count < bottom - top:
+            src = (0, (top + count) * ch, cols * cw, (bottom - top - count) * ch) if lines > 0 else (
+                0, top * ch, cols * cw, (bottom - top - count) * ch)
+
+            self.__move_pixels(surface, src, (src[0], src[1] + offset, src[2], src[3]))
+
+        uncovered = (0, (bottom - count) * ch, cols * cw, count * ch) if lines > 0 else (0, top * ch, cols * cw,
+                                                                                          count * ch)
+
+        sdl2.SDL_SetRenderDrawColor(surface, 0, 0, 0, 0)
+        sdl2.SDL_RenderFillRect(surface, sdl2.SDL_Rect(*uncovered))
+        self._draw_calls += 1
+
+        areas = list(damage)
+        areas.extend(area for area, _ in previous_rects)
+
+        for j, other in enumerate(self.streams):
+            if j != index:
+                other_rows, other_cols = other.shape
+                areas.append((0, 0, other_cols * w * other.sx, other_rows * h * other.sy))
+
+        # The pixels of the areas are damaged where they were and where they are moved.
+        for area in areas:
+            clipped_area = clip_rect(area, region)
+
+            if clipped_area is not None:
+                x, y, aw, ah = clipped_area
+                moved_area = clip_rect((x, y + offset, aw, ah), region)
+
+                damage.append(clipped_area)
+
+                if moved_area is not None:
+                    damage.append(moved_area)
+
+        # The cells waiting to be drawn are moved with the rows.
+        scrolled = {(x, y) for x, y in deferred if top <= y < bottom}
+        deferred.difference_update(scrolled)
+        deferred.update((x, y + offset // ch) for x, y in scrolled if top <= y + offset // ch < bottom)
+
+        return previous if previous is None else matrix.scroll_state(previous, top, bottom, lines)
+
+    def present(self, surface: sdl2.SDL_Renderer) -> sdl2.SDL_Texture:
+        w, h = self.font.size
+
+        if self.current is None or self.__dst_size != self.size:
+            self.create(surface)
+
+        layout = self.__get_layout()
+
+        self.font.begin_frame()
+
+        sdl2.SDL_SetRenderTarget(surface, self.current)
+
+        if layout != self.__layout:
+            self.__layout = layout
+            self.__present_all(surface, w, h)
+        else:
+            self.__present_damage(surface, w, h)
 
         sdl2.SDL_SetRenderTarget(surface, None)
 
         return self.current
 
     def clear(self, surface: sdl2.SDL_Renderer) -> None:
+        """
+        Clear the texture, all the streams are drawn again in the next present.
+
+        :param surface: Renderer.
+        :return: None
+        """
+        self.__layout = None
+
         if self.current is not None:
             sdl2.SDL_SetRenderTarget(surface, self.current)
             sdl2.SDL_SetRenderDrawColor(surface, 0, 0, 0, 0)
             sdl2.SDL_RenderClear(surface)
+            sdl2.SDL_SetRenderTarget(surface, None)
+
+    @property
+    def pending(self) -> bool:
+        return any(self.__deferred)
 
     @property
     def current(self) -> typing.Union[sdl2.SDL_Texture, None]:
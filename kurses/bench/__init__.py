@@ -0,0 +1,422 @@
+import abc
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+import tracemalloc
+import typing
+
+import kurses.stream
+import kurses.stream.attributes
+import kurses.stream.array
+
+DEFAULT_FONT_FILENAME = os.path.normpath(
+    os.path.join(os.path.dirname(__file__), "..", "..", "examples", "ModernDOS8x16.ttf")
+)
+
+ALL_MATRIX_ENGINES: typing.Dict[str, type] = {
+    "list": kurses.stream.BufferMatrix,
+    "array": kurses.stream.array.ArrayBufferMatrix,
+}
+
+ResultType = typing.Dict[str, typing.Any]
+
+
+class Scenario(abc.ABC):
+    """
+    Scenario of benchmark, the setup is not measured, only the steps.
+    """
+
+    name: str = ""
+    unit: str = "cells"
+    max_frames: typing.Optional[int] = None
+    memory: bool = True
+
+    def __init__(self, **options):
+        self.options = options
+
+    def setup(self) -> None:
+        ...
+
+    @abc.abstractmethod
+    def step(self) -> int:
+        """
+        Run one frame of the scenario.
+
+        :return: Number of units (see Scenario.unit) processed in the frame.
+        """
+        ...
+
+    def teardown(self) -> None:
+        ...
+
+    def stats(self) -> ResultType:
+        """
+        Get the extra statistics of the scenario, read after the last step.
+
+        :return: ResultType
+        """
+        return {}
+
+
+class TerminalScenario(Scenario, abc.ABC):
+    """
+    Scenario drawn by a headless terminal, every step is presented: stream, texture and present.
+    """
+
+    def setup(self):
+        import kurses.backend
+
+        self.term = kurses.backend.HeadlessTerminal(
+            self.options.get("font_filename", DEFAULT_FONT_FILENAME),
+            shape=self.options.get("shape", (80, 30)),
+            size=self.options.get("size", (640, 480)),
+            matrix=ALL_MATRIX_ENGINES[self.options.get("matrix", "list")],
+            atlas=self.options.get("atlas", False),
+            glyph_cache_dir=self.options.get("glyph_cache_dir", None),
+            bitmap_enabled=self.options.get("bitmap_enabled", False),
+        )
+        self.random = random.Random(self.options.get("seed", 0))
+
+    def present(self):
+        self.term.clean()
+        self.term.draw()
+
+    def teardown(self):
+        self.term.font.flush()
+        del self.term
+
+    def glyph_cache_stats(self) -> ResultType:
+        font = self.term.font
+
+        if font.atlas:
+            atlas = font.glyph_atlas
+            lookups = atlas.hits + atlas.misses
+
+            return {
+                "glyph_cache": {
+                    "hits": atlas.hits,
+                    "misses": atlas.misses,
+                    "resident_bytes": atlas.resident_bytes,
+                    "hit_rate": atlas.hits / lookups if lookups else 0.0,
+                }
+            }
+
+        return {"glyph_cache": font.allocate_textures.stats}
+
+
+class StreamScenario(TerminalScenario, abc.ABC):
+    """
+    Scenario of the stream of the terminal, with the statistics of the glyph cache.
+    """
+
+    def stats(self) -> ResultType:
+        return self.glyph_cache_stats()
+
+
+class PrintScenario(StreamScenario):
+    """
+    StreamBuffer.print of a text that fills the screen.
+    """
+
+    name = "print"
+
+    def setup(self):
+        super().setup()
+
+        rows, columns = self.term.shape
+        words = ["kurses", "stream", "texture", "present", "buffer", "glyph", "cell"]
+
+        self.text = " ".join(self.random.choice(words) for _ in range(columns * rows))[:columns * rows]
+
+    def step(self) -> int:
+        stream = self.term.stream
+
+        stream.clrscr()
+        stream.gotoxy(0, 0)
+        stream.print(self.text)
+
+        self.present()
+
+        return len(self.text)
+
+
+class RandomColorsScenario(StreamScenario):
+    """
+    Every cell of the screen with random foreign and background colors, like examples/testing.py.
+    """
+
+    name = "colors"
+
+    def step(self) -> int:
+        stream = self.term.stream
+        rows, columns = self.term.shape
+        randint = self.random.randint
+
+        stream.clrscr()
+
+        for y in range(rows):
+            for x in range(columns):
+                stream.set_foreign_color((randint(0, 255), randint(0, 255), randint(0, 255)))
+                stream.set_background_color((randint(0, 255), randint(0, 255), randint(0, 255)))
+                stream.putchxy(x, y, chr(randint(33, 126)))
+
+        self.present()
+
+        return columns * rows
+
+
+class ReshapeScenario(Scenario):
+    """
+    Reshape of a full buffer matrix, between the shape and the double of the columns.
+    """
+
+    name = "reshape"
+
+    def setup(self):
+        columns, rows = self.options.get("shape", (80, 30))
+        engine = ALL_MATRIX_ENGINES[self.options.get("matrix", "list")]
+
+        self.shapes = (rows, columns), (rows, columns * 2)
+        self.matrix = engine(self.shapes[0])
+        self.current = 0
+
+        for y in range(rows):
+            for x in range(columns):
+                self.matrix[x, y] = kurses.stream.attributes.CharacterAttribute(x=x, y=y, code=ord("#"))
+
+        self.cells = rows * columns
+
+    def step(self) -> int:
+        self.current = 1 - self.current
+        self.matrix.reshape(self.shapes[self.current])
+
+        return self.cells
+
+
+class GraphicsScenario(TerminalScenario):
+    """
+    GraphicsBuffer with thousands of primitives (lines, rectangles, circles and polygons) per frame.
+    """
+
+    name = "graphics"
+    unit = "primitives"
+
+    def setup(self):
+        self.options["bitmap_enabled"] = True
+
+        super().setup()
+
+        width, height = self.term.size
+        uniform = self.random.randint
+
+        self.figures = []
+
+        for i in range(self.options.get("primitives", 2000)):
+            color = uniform(0, 255), uniform(0, 255), uniform(0, 255)
+            x, y = uniform(0, width), uniform(0, height)
+
+            self.figures.append((i % 4, x, y, color))
+
+    def step(self) -> int:
+        graphics = self.term.graphics
+
+        for kind, x, y, color in self.figures:
+            if kind == 0:
+                graphics.line((x, y), (x + 24, y + 12), color)
+            elif kind == 1:
+                graphics.rect(x, y, (16, 12), color, filled=True)
+            elif kind == 2:
+                graphics.circle(x, y, 8, color)
+            else:
+                graphics.polygon([x, y, x + 12, y, x + 6, y + 10], color, filled=True)
+
+        self.present()
+
+        return len(self.figures)
+
+
+class BuzzerScenario(TerminalScenario):
+    """
+    Synthesis of a track of the buzzer (SDL2Buzzer.play).
+    """
+
+    name = "buzzer"
+    unit = "samples"
+
+    def setup(self):
+        super().setup()
+
+        self.notes = [(self.random.choice([0, 262, 330, 392, 523]), 50) for _ in range(self.options.get("notes", 40))]
+        self.term.buzzer.record(0, self.notes)
+
+    def step(self) -> int:
+        buzzer = self.term.buzzer
+
+        buzzer.play(0)
+        buzzer.stop()
+
+        return sum(int(buzzer.sample_rate * duration_ms / 1000.0) for _, duration_ms in self.notes)
+
+    def teardown(self):
+        # The audio device is released now, the terminal can be collected later than the next scenario opens it.
+        self.term.buzzer.close()
+        super().teardown()
+
+
+STARTUP_SCRIPT = """
+import json, sys, time
+start = time.perf_counter()
+import kurses
+imported = time.perf_counter()
+terminal_class = kurses.HeadlessTerminal
+loaded = time.perf_counter()
+term = terminal_class(sys.argv[1])
+created = time.perf_counter()
+term.stream.print("Hello world")
+term.main_loop(frames=1)
+drawn = time.perf_counter()
+json.dump({"import": imported - start, "backend": loaded - imported, "terminal": created - loaded,
+           "first_frame": drawn - created}, sys.stdout)
+"""
+
+
+class StartupScenario(Scenario):
+    """
+    Launch of a new process: import of kurses, import of the backend, creation of a headless terminal and first
+    frame. Every step is a process, the interpreter startup is included in the time of the process.
+    """
+
+    name = "startup"
+    unit = "launches"
+    max_frames = 10
+    memory = False
+
+    def setup(self):
+        self.timings: typing.List[typing.Dict[str, float]] = []
+        self.env = dict(os.environ, PYTHONPATH=os.pathsep.join(
+            [os.path.dirname(os.path.dirname(os.path.abspath(kurses.__file__)))] +
+            [path for path in [os.environ.get("PYTHONPATH")] if path]
+        ))
+
+    def step(self) -> int:
+        start = time.perf_counter()
+
+        output = subprocess.run(
+            [sys.executable, "-c", STARTUP_SCRIPT, self.options.get("font_filename", DEFAULT_FONT_FILENAME)],
+            env=self.env, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, check=True
+        ).stdout
+
+        timings = json.loads(output)
+        timings["process"] = time.perf_counter() - start
+        self.timings.append(timings)
+
+        return 1
+
+    def stats(self) -> ResultType:
+        return {
+            "startup": {
+                name: sum(timings[name] for timings in self.timings) / len(self.timings)
+                for name in self.timings[0]
+            } if self.timings else {}
+        }
+
+
+ALL_SCENARIOS: typing.Dict[str, typing.Type[Scenario]] = {
+    scenario.name: scenario for scenario in (
+        PrintScenario, RandomColorsScenario, ReshapeScenario, GraphicsScenario, BuzzerScenario, StartupScenario
+    )
+}
+
+
+def measure(scenario: Scenario, frames: int) -> typing.Tuple[float, int]:
+    """
+    Run the steps of the scenario.
+
+    :param scenario: Scenario, already set up.
+    :param frames: Number of steps.
+    :return: The seconds and the units processed.
+    """
+    units = 0
+    start = time.perf_counter()
+
+    for _ in range(frames):
+        units += scenario.step()
+
+    return time.perf_counter() - start, units
+
+
+def run_scenario(name: str, frames: int = 100, memory: bool = True, **options) -> ResultType:
+    """
+    Run a scenario of benchmark.
+
+    The throughput is measured without tracing, the peak of memory (allocations of Python traced by tracemalloc,
+    including the setup) is measured in a second run, because the tracing slows down the scenario.
+
+    :param name: Name of scenario (see ALL_SCENARIOS).
+    :param frames: Number of frames (steps) of the scenario.
+    :param memory: Measure the peak of memory.
+    :return: ResultType
+    """
+    scenario = ALL_SCENARIOS[name](**options)
+    frames = min(frames, scenario.max_frames) if scenario.max_frames is not None else frames
+    scenario.setup()
+
+    try:
+        seconds, units = measure(scenario, frames)
+        stats = scenario.stats()
+    finally:
+        scenario.teardown()
+
+    result = {
+        "scenario": name,
+        "frames": frames,
+        "seconds": seconds,
+        "fps": frames / seconds if seconds else 0.0,
+        "unit": scenario.unit,
+        "throughput": units / seconds if seconds else 0.0,
+        **stats,
+    }
+
+    if memory and scenario.memory:
+        tracemalloc.start()
+
+        scenario = ALL_SCENARIOS[name](**options)
+        scenario.setup()
+
+        try:
+            measure(scenario, frames)
+        finally:
+            scenario.teardown()
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+
+        result["peak_memory"] = peak
+
+    return result
+
+
+def run(scenarios: typing.Optional[typing.Iterable[str]] = None, frames: int = 100, memory: bool = True,
+        **options) -> ResultType:
+    """
+    Run the scenarios of benchmark, the report can be serialized as JSON.
+
+    :param scenarios: Names of scenarios, with default value None (all the scenarios).
+    :param frames: Number of frames (steps) of every scenario.
+    :param memory: Measure the peak of memory.
+    :return: ResultType
+    """
+    import sdl2
+
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "pysdl2": sdl2.__version__,
+        "options": dict(options),
+        "scenarios": [
+            run_scenario(name, frames, memory, **options) for name in (scenarios or ALL_SCENARIOS)
+        ],
+    }
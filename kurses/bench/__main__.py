@@ -0,0 +1,51 @@
+import argparse
+import json
+import sys
+
+import kurses.bench
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m kurses.bench",
+        description="Benchmark of the pipeline stream, texture and present of kurses, the report is printed as JSON."
+    )
+    parser.add_argument("scenarios", nargs="*", metavar="scenario",
+                        help=f"scenarios to run ({', '.join(kurses.bench.ALL_SCENARIOS)}), all by default")
+    parser.add_argument("--frames", type=int, default=100, help="frames of every scenario")
+    parser.add_argument("--font", default=kurses.bench.DEFAULT_FONT_FILENAME, help="font filename")
+    parser.add_argument("--matrix", choices=list(kurses.bench.ALL_MATRIX_ENGINES), default="list",
+                        help="engine of the buffer matrix")
+    parser.add_argument("--atlas", action="store_true", help="rasterize the glyphs into an atlas")
+    parser.add_argument("--glyph-cache-dir", help="directory of the persistent cache of the glyphs (with --atlas)")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the random scenarios")
+    parser.add_argument("--no-memory", action="store_true", help="do not measure the peak of memory")
+    parser.add_argument("--output", "-o", help="write the report into a file")
+
+    args = parser.parse_args(argv)
+
+    for name in args.scenarios:
+        if name not in kurses.bench.ALL_SCENARIOS:
+            parser.error(f"unknown scenario: {name}")
+
+    report = kurses.bench.run(
+        args.scenarios,
+        frames=args.frames,
+        memory=not args.no_memory,
+        font_filename=args.font,
+        matrix=args.matrix,
+        atlas=args.atlas,
+        glyph_cache_dir=args.glyph_cache_dir,
+        seed=args.seed,
+    )
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        sys.stdout.write("\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+import abc
+import collections
+import math
+import typing
+
+DEFAULT_SPIN_THRESHOLD = 0.002
+DEFAULT_WINDOW_FRAMES = 120
+
+
+class FrameClock(abc.ABC):
+    """
+    Frame scheduler, limit the frames per second with a hybrid wait: sleep most of the remaining time of the frame
+    and spin the last part (spin_threshold seconds), because the sleep of the system is not precise.
+    """
+
+    def __init__(self, spin_threshold: float = DEFAULT_SPIN_THRESHOLD, window: int = DEFAULT_WINDOW_FRAMES):
+        """
+        FrameClock constructor.
+
+        :param spin_threshold: Seconds before the end of the frame that are spun instead of slept.
+        :param window: Number of frames used to compute the statistics.
+        """
+        self.spin_threshold = spin_threshold
+        self.__frame_times: typing.Deque[float] = collections.deque(maxlen=window)
+        self.__last: typing.Optional[int] = None
+        self.__dt = 0.0
+
+    @abc.abstractmethod
+    def counter(self) -> int:
+        """
+        Get the current value of the high resolution counter.
+
+        :return: int
+        """
+        ...
+
+    @property
+    @abc.abstractmethod
+    def frequency(self) -> int:
+        """
+        Get the counts per second of the high resolution counter.
+
+        :return: int
+        """
+        ...
+
+    @abc.abstractmethod
+    def delay(self, seconds: float) -> None:
+        """
+        Sleep the current thread.
+
+        :param seconds: Time to sleep.
+        :return: None
+        """
+        ...
+
+    def start(self) -> None:
+        """
+        Start the clock, the next tick measures the time from now.
+
+        :return: None
+        """
+        self.__last = self.counter()
+        self.__frame_times.clear()
+
+    def remaining(self, fps: typing.Optional[float]) -> float:
+        """
+        Get the seconds until the end of the current frame.
+
+        :param fps: Limit frames per second, None or 0 for no limit.
+        :return: float
+        """
+        if not fps or self.__last is None:
+            return 0.0
+
+        target = self.__last + self.frequency / fps
+
+        return max((target - self.counter()) / self.frequency, 0.0)
+
+    def wait(self, fps: typing.Optional[float]) -> None:
+        """
+        Wait until the end of the current frame, sleeping and spinning the last part.
+
+        :param fps: Limit frames per second, None or 0 for no limit.
+        :return: None
+        """
+        remaining = self.remaining(fps)
+
+        if remaining > self.spin_threshold:
+            self.delay(remaining - self.spin_threshold)
+
+        while self.remaining(fps) > 0.0:
+            pass
+
+    def tick(self, fps: typing.Optional[float] = None) -> float:
+        """
+        Wait the end of frame and measure the delta time since the previous tick.
+
+        :param fps: Limit frames per second, None or 0 for no limit.
+        :return: Delta time in seconds.
+        """
+        if self.__last is None:
+            self.start()
+
+        self.wait(fps)
+
+        now = self.counter()
+        last = now if self.__last is None else self.__last
+        self.__dt = (now - last) / self.frequency
+        self.__last = now
+        self.__frame_times.append(self.__dt)
+
+        return self.__dt
+
+    @property
+    def dt(self) -> float:
+        return self.__dt
+
+    @property
+    def frame_time(self) -> float:
+        """
+        Get the average time of the frames in the window.
+
+        :return: float
+        """
+        if not self.__frame_times:
+            return 0.0
+
+        return sum(self.__frame_times) / len(self.__frame_times)
+
+    @property
+    def jitter(self) -> float:
+        """
+        Get the standard deviation of the time of the frames in the window.
+
+        :return: float
+        """
+        if len(self.__frame_times) < 2:
+            return 0.0
+
+        mean = self.frame_time
+
+        return math.sqrt(sum((t - mean) ** 2 for t in self.__frame_times) / (len(self.__frame_times) - 1))
+
+    @property
+    def fps(self) -> float:
+        """
+        Get the measured frames per second.
+
+        :return: float
+        """
+        frame_time = self.frame_time
+
+        return 1.0 / frame_time if frame_time > 0.0 else 0.0
@@ -3,6 +3,8 @@ import typing
 
 from kurses.interface.joystick import JoystickType
 
+EventType = typing.Tuple[str, typing.Tuple[typing.Any, ...]]
+
 
 class EventTargetRuntime(abc.ABC):
     """
@@ -126,6 +128,15 @@ class EventTargetRuntime(abc.ABC):
     def joystick(self, inputs: typing.Tuple[JoystickType, ...]):
         ...
 
+    def events(self, batch: typing.List[EventType]):
+        """
+        Event with all the input events of the frame, in order. When this method is overridden, the events key_down,
+        key_up, mouse and scroll are delivered in the batch instead of calling their methods.
+        :param batch: List of events (name of method and arguments), e.g. ("key_down", ("a",)).
+        :return:
+        """
+        ...
+
 
 class EmptyTargetRuntime(EventTargetRuntime):
     """
@@ -1,12 +1,24 @@
 import abc
+import collections
+import concurrent.futures
+import dataclasses
 import enum
+import queue
 import typing
 
+import kurses.colors
 import kurses.stream
-from kurses.stream import CharacterAttribute
+import kurses.stream.attributes
+from kurses.glyph_store import GlyphStore
 
 R = typing.TypeVar("R", bound="FontResources")
 
+DEFAULT_CACHE_SIZE = 4096
+DEFAULT_PRELOAD_WORKERS = 1
+
+PreloadColors = typing.Iterable[typing.Tuple[kurses.colors.TupleColor, kurses.colors.TupleColor]]
+PreloadProgress = typing.Callable[[int, int], None]
+
 
 class QualityFont(enum.Enum):
     SOLID = 0
@@ -21,21 +33,485 @@ class EncodingFont(enum.Enum):
     UNICODE = 2
 
 
+@dataclasses.dataclass(frozen=True)
+class FontMetrics:
+    """
+    Metrics of a font (size and style) in pixels, the cell of the terminal is advance x height.
+    """
+
+    advance: int
+    height: int
+    ascent: int
+    descent: int
+    line_skip: int
+    underline: int
+    monospace: bool
+
+    @property
+    def baseline(self) -> int:
+        """
+        Get the row of the baseline, from the top of the cell.
+
+        :return: int
+        """
+        return self.ascent
+
+    @property
+    def cell(self) -> typing.Tuple[int, int]:
+        return self.advance, self.height
+
+
+class GlyphCache:
+    """
+    Least recently used cache of glyph textures, bounded by number of entries and/or resident bytes.
+    """
+
+    def __init__(self, max_entries: typing.Optional[int] = DEFAULT_CACHE_SIZE, max_bytes: typing.Optional[int] = None,
+                 on_evict: typing.Optional[typing.Callable[[typing.Any], None]] = None,
+                 sizeof: typing.Optional[typing.Callable[[typing.Any], int]] = None):
+        """
+        GlyphCache constructor.
+
+        :param max_entries: Max number of entries, None for no limit.
+        :param max_bytes: Max number of resident bytes, None for no limit.
+        :param on_evict: Function to release the values removed from the cache.
+        :param sizeof: Function to get the size in bytes of a value.
+        """
+        self.__entries: typing.OrderedDict[typing.Hashable, typing.Tuple[typing.Any, int]] = \
+            collections.OrderedDict()
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.on_evict = on_evict
+        self.sizeof = sizeof
+
+        self.__hits = 0
+        self.__misses = 0
+        self.__evictions = 0
+        self.__resident_bytes = 0
+
+    def __len__(self) -> int:
+        return len(self.__entries)
+
+    def __contains__(self, key: typing.Hashable) -> bool:
+        return key in self.__entries
+
+    def __getitem__(self, key: typing.Hashable) -> typing.Any:
+        value = self.get(key)
+
+        if value is None:
+            raise KeyError(key)
+
+        return value
+
+    def __setitem__(self, key: typing.Hashable, value: typing.Any):
+        if key in self.__entries:
+            self.__remove(key)
+
+        nbytes = self.sizeof(value) if self.sizeof is not None else 0
+
+        self.__entries[key] = value, nbytes
+        self.__resident_bytes += nbytes
+
+        self.__evict()
+
+    def get(self, key: typing.Hashable, default: typing.Any = None) -> typing.Any:
+        """
+        Get value of cache, counting the hit or the miss.
+
+        :param key: Key of value.
+        :param default: Value returned on miss.
+        :return: typing.Any
+        """
+        entry = self.__entries.get(key, None)
+
+        if entry is None:
+            self.__misses += 1
+            return default
+
+        self.__hits += 1
+        self.__entries.move_to_end(key)
+
+        return entry[0]
+
+    def items(self) -> typing.Generator[typing.Tuple[typing.Hashable, typing.Any], None, None]:
+        for key, (value, _) in list(self.__entries.items()):
+            yield key, value
+
+    def __remove(self, key: typing.Hashable) -> typing.Any:
+        value, nbytes = self.__entries.pop(key)
+        self.__resident_bytes -= nbytes
+
+        if self.on_evict is not None:
+            self.on_evict(value)
+
+        return value
+
+    def __overflow(self) -> bool:
+        if self.max_entries is not None and len(self.__entries) > self.max_entries:
+            return True
+
+        return self.max_bytes is not None and self.__resident_bytes > self.max_bytes
+
+    def __evict(self):
+        while self.__overflow() and len(self.__entries) > 1:
+            self.__remove(next(iter(self.__entries)))
+            self.__evictions += 1
+
+    def clear(self):
+        for key in list(self.__entries.keys()):
+            self.__remove(key)
+
+    @property
+    def hits(self) -> int:
+        return self.__hits
+
+    @property
+    def misses(self) -> int:
+        return self.__misses
+
+    @property
+    def evictions(self) -> int:
+        return self.__evictions
+
+    @property
+    def resident_bytes(self) -> int:
+        return self.__resident_bytes
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.__hits + self.__misses
+
+        return self.__hits / total if total > 0 else 0.0
+
+    @property
+    def stats(self) -> typing.Dict[str, typing.Union[int, float]]:
+        return {
+            "entries": len(self),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "resident_bytes": self.resident_bytes,
+            "hit_rate": self.hit_rate,
+        }
+
+
+class GlyphPreload:
+    """
+    Progress of a preload of glyphs, the glyphs are counted when they are uploaded (render thread).
+    """
+
+    def __init__(self, total: int, progress: typing.Optional[PreloadProgress] = None):
+        """
+        GlyphPreload constructor.
+
+        :param total: Number of glyphs to preload.
+        :param progress: Function called with the uploaded and the total glyphs, after every upload.
+        """
+        self.__total = total
+        self.__uploaded = 0
+        self.__cancelled = False
+        self.on_progress = progress
+
+    @property
+    def total(self) -> int:
+        return self.__total
+
+    @property
+    def uploaded(self) -> int:
+        return self.__uploaded
+
+    @property
+    def progress(self) -> float:
+        """
+        Get the fraction of the glyphs uploaded, between 0.0 and 1.0.
+
+        :return: float
+        """
+        return self.__uploaded / self.__total if self.__total else 1.0
+
+    @property
+    def done(self) -> bool:
+        return self.__cancelled or self.__uploaded >= self.__total
+
+    @property
+    def cancelled(self) -> bool:
+        return self.__cancelled
+
+    def cancel(self):
+        self.__cancelled = True
+
+    def advance(self):
+        self.__uploaded += 1
+
+        if self.on_progress is not None:
+            self.on_progress(self.__uploaded, self.__total)
+
+
 class FontResources(abc.ABC, typing.Generic[R]):
     def __init__(self, filename: str, ptsize: int = 16, depth_colors: int = 8, **kwargs):
-        self.__allocate_textures: typing.Dict[CharacterAttribute, typing.Any] = {}
+        """
+        FontResources constructor.
+
+        :param filename: Font source filename.
+        :param ptsize: Size of font, with default value 16.
+        :param depth_colors: Depth of colors in bits, with default value 8.
+        :keyword quality: Quality of rendering, with default value QualityFont.BLENDED.
+        :keyword encoding: Encoding of text, with default value EncodingFont.ASCII.
+        :keyword atlas: Rasterize the glyphs into an atlas, with default value False.
+        :keyword auto_clean_cache: Evict the least recently used textures, with default value True.
+        :keyword cache_size: Max number of textures in the cache, with default value 4096.
+        :keyword cache_bytes: Max number of bytes of textures in the cache, with default value None (no limit).
+        :keyword raster_budget: Max number of glyphs rasterized per frame, the other glyphs are deferred to the next
+            frames and a placeholder is drawn, with default value None (no limit).
+        :keyword preload_workers: Number of threads to rasterize the glyphs of preload, with default value 1.
+        :keyword glyph_cache_dir: Directory of the persistent cache of the glyphs of the atlas, with default value None
+            (disabled). See kurses.glyph_store.get_default_cache_dir.
+        """
         self.__filename = filename
         self.__ptsize = ptsize
         self.__depth_colors = depth_colors
+        self.__depth_cache: typing.Dict[kurses.colors.TupleColor, kurses.colors.TupleColor] = {}
         self.__quality_font = kwargs.get("quality", QualityFont.BLENDED)
         self.__encoding = kwargs.get("encoding", EncodingFont.ASCII)
+        self.__atlas = kwargs.get("atlas", False)
         self.auto_clean_cache = kwargs.get("auto_clean_cache", True)
         self.auto_clean_buffer = kwargs.get("auto_clean_buffer", True)
 
+        self._draw_calls = 0
+        self.raster_budget: typing.Optional[int] = kwargs.get("raster_budget", None)
+        self.__frame_rasterized = 0
+        self.__glyphs_created = 0
+        self.__glyphs_deferred = 0
+        self.__allocate_textures = GlyphCache(
+            max_entries=kwargs.get("cache_size", DEFAULT_CACHE_SIZE) if self.auto_clean_cache else None,
+            max_bytes=kwargs.get("cache_bytes", None) if self.auto_clean_cache else None,
+            on_evict=self.destroy_texture,
+            sizeof=self.get_texture_bytes
+        )
+
+        self.__preload_workers = kwargs.get("preload_workers", DEFAULT_PRELOAD_WORKERS)
+        self.__preload_executor: typing.Optional[concurrent.futures.ThreadPoolExecutor] = None
+        self.__preload_futures: typing.List[concurrent.futures.Future] = []
+        self.__preloaded: queue.Queue = queue.Queue()
+        self.__preloads: typing.List[GlyphPreload] = []
+
+        self.__glyph_cache_dir = kwargs.get("glyph_cache_dir", None)
+        self.__glyph_store = self.__create_glyph_store()
+
+    def __create_glyph_store(self) -> typing.Optional[GlyphStore]:
+        if self.__glyph_cache_dir is None or not self.__atlas:
+            return None
+
+        return GlyphStore(
+            self.__glyph_cache_dir, self.__filename, self.__ptsize, self.__quality_font.name, self.__encoding.name
+        )
+
     @property
-    def allocate_textures(self):
+    def allocate_textures(self) -> GlyphCache:
         return self.__allocate_textures
 
+    @property
+    def draw_calls(self) -> int:
+        """
+        Get the number of draw calls issued to draw the characters, since the font was created.
+
+        :return: int
+        """
+        return self._draw_calls
+
+    @property
+    def glyphs_created(self) -> int:
+        """
+        Get the number of glyphs rasterized to draw the characters, since the font was created.
+
+        :return: int
+        """
+        return self.__glyphs_created
+
+    @property
+    def glyphs_deferred(self) -> int:
+        """
+        Get the number of characters drawn with a placeholder because the raster budget of the frame was exhausted,
+        since the font was created.
+
+        :return: int
+        """
+        return self.__glyphs_deferred
+
+    def begin_frame(self):
+        """
+        Start the raster budget of a frame.
+
+        :return: None
+        """
+        self.__frame_rasterized = 0
+
+    def reserve_raster(self) -> bool:
+        """
+        Count a glyph rasterized in the frame.
+
+        :return: False if the raster budget of the frame is exhausted, the glyph must be deferred.
+        """
+        if self.raster_budget is not None and self.__frame_rasterized >= self.raster_budget:
+            self.__glyphs_deferred += 1
+            return False
+
+        self.__frame_rasterized += 1
+        self.__glyphs_created += 1
+
+        return True
+
+    @property
+    def glyph_store(self) -> typing.Optional[GlyphStore]:
+        """
+        Get the persistent cache of the glyphs of the atlas, None if it is disabled.
+
+        :return: typing.Optional[GlyphStore]
+        """
+        return self.__glyph_store
+
+    def flush(self):
+        """
+        Write the glyphs rasterized since the last flush into the persistent cache.
+
+        :return: None
+        """
+        if self.__glyph_store is not None:
+            self.__glyph_store.save()
+
+    def get_glyph_key(self, code: int, foreign: kurses.colors.TupleColor = (255, 255, 255),
+                      background: kurses.colors.TupleColor = (0, 0, 0), style: int = 0) -> int:
+        """
+        Get the key of the glyph (texture or region of atlas) used to draw a character.
+
+        :param code: Code of character.
+        :param foreign: Foreign color, ignored by the atlas.
+        :param background: Background color, ignored by the atlas.
+        :param style: Style of character.
+        :return: int
+        """
+        key = kurses.stream.attributes.pack_cell_key(code, foreign, background, style)
+
+        return key & kurses.stream.attributes.CELL_KEY_GLYPH_MASK if self.__atlas else key
+
+    def preload(self, charset: typing.Union[str, typing.Iterable[int]], styles: typing.Iterable[int] = (0,),
+                colors: typing.Optional[PreloadColors] = None,
+                progress: typing.Optional[PreloadProgress] = None) -> GlyphPreload:
+        """
+        Rasterize a set of characters ahead of time. The glyphs are rasterized by worker threads and uploaded by
+        upload, in the render thread.
+
+        :param charset: Characters (string or codes).
+        :param styles: Styles of the characters, with default value (0, ) (normal).
+        :param colors: Pairs of foreign and background colors, ignored by the atlas, with default value white on black.
+        :param progress: Function called with the uploaded and the total glyphs, after every upload.
+        :return: GlyphPreload
+        """
+        codes = [ord(c) for c in charset] if isinstance(charset, str) else list(charset)
+        colors = list(colors) if colors is not None else [((255, 255, 255), (0, 0, 0))]
+        styles = list(styles)
+
+        keys = list(dict.fromkeys(
+            self.get_glyph_key(code, fg, bg, style) for code in codes for style in styles for fg, bg in colors
+        ))
+        keys = [key for key in keys if not self.is_glyph_cached(key)]
+
+        preload = GlyphPreload(len(keys), progress)
+
+        if not keys:
+            return preload
+
+        if self.__preload_executor is None:
+            self.__preload_executor = concurrent.futures.ThreadPoolExecutor(
+                max_workers=self.__preload_workers, thread_name_prefix="kurses-preload"
+            )
+
+        self.__preloads.append(preload)
+        self.__preload_futures = [future for future in self.__preload_futures if not future.done()]
+
+        for key in keys:
+            self.__preload_futures.append(self.__preload_executor.submit(self.__rasterize_preload, preload, key))
+
+        return preload
+
+    def __rasterize_preload(self, preload: GlyphPreload, key: int):
+        if preload.cancelled:
+            self.__preloaded.put((preload, key, None))
+            return
+
+        try:
+            glyph = self.rasterize_glyph(key)
+        except Exception:
+            glyph = None
+
+        self.__preloaded.put((preload, key, glyph))
+
+    @property
+    def preloading(self) -> bool:
+        """
+        Get if there are glyphs of preload not uploaded yet.
+
+        :return: bool
+        """
+        return bool(self.__preloads)
+
+    def upload(self, surface: R, budget: typing.Optional[int] = None, block: bool = False) -> int:
+        """
+        Upload the glyphs rasterized by the preloads, it must be called in the render thread.
+
+        :param surface: Render surface.
+        :param budget: Max number of glyphs to upload, with default value None (no limit).
+        :param block: Wait for the preloads in progress to finish.
+        :return: Number of glyphs uploaded.
+        """
+        count = 0
+
+        while self.__preloads and (budget is None or count < budget):
+            try:
+                preload, key, glyph = self.__preloaded.get(block=block)
+            except queue.Empty:
+                break
+
+            if glyph is not None:
+                if preload.cancelled or self.is_glyph_cached(key):
+                    self.release_glyph(glyph)
+                else:
+                    self.upload_glyph(surface, key, glyph)
+                    count += 1
+
+            preload.advance()
+
+            self.__preloads = [preload for preload in self.__preloads if not preload.done]
+
+        return count
+
+    def cancel_preload(self):
+        """
+        Cancel the preloads in progress and stop the worker threads.
+
+        :return: None
+        """
+        for preload in self.__preloads:
+            preload.cancel()
+
+        # The futures are cancelled one by one, shutdown has no cancel_futures before Python 3.9.
+        for future in self.__preload_futures:
+            future.cancel()
+
+        self.__preload_futures = []
+
+        if self.__preload_executor is not None:
+            self.__preload_executor.shutdown(wait=True)
+            self.__preload_executor = None
+
+        while not self.__preloaded.empty():
+            _, _, glyph = self.__preloaded.get()
+
+            if glyph is not None:
+                self.release_glyph(glyph)
+
+        self.__preloads = []
+
     @property
     def filename(self) -> str:
         return self.__filename
@@ -44,10 +520,44 @@ class FontResources(abc.ABC, typing.Generic[R]):
     def ptsize(self) -> int:
         return self.__ptsize
 
+    @ptsize.setter
+    def ptsize(self, ptsize: int):
+        """
+        Set the size of font, the font is reloaded: the glyphs and the metrics are computed again.
+
+        :param ptsize: Size of font.
+        :return: None
+        """
+        if ptsize == self.__ptsize:
+            return
+
+        self.cancel_preload()
+        self.flush()
+
+        self.__ptsize = ptsize
+        self.__glyph_store = self.__create_glyph_store()
+
+        self.reload()
+
     @property
     def depth_colors(self) -> int:
         return self.__depth_colors
 
+    def get_depth_color(self, color: kurses.colors.TupleColor) -> kurses.colors.TupleColor:
+        """
+        Cast a color to the depth of colors of the font, the casts are cached because the cells share the colors of a
+        few styles (see kurses.stream.style).
+
+        :param color: Color.
+        :return: kurses.colors.TupleColor
+        """
+        depth_color = self.__depth_cache.get(color)
+
+        if depth_color is None:
+            depth_color = self.__depth_cache[color] = kurses.colors.cast_depth_colors(color, self.__depth_colors)
+
+        return depth_color
+
     @property
     def quality(self) -> QualityFont:
         return self.__quality_font
@@ -57,8 +567,52 @@ class FontResources(abc.ABC, typing.Generic[R]):
         return self.__encoding
 
     @property
+    def atlas(self) -> bool:
+        """
+        Get if the glyphs are rasterized once per character and style into an atlas, and the colors are applied
+        when they are drawn.
+
+        :return: bool
+        """
+        return self.__atlas
+
+    @property
+    @abc.abstractmethod
+    def size(self) -> typing.Tuple[int, int]:
+        """
+        Get the size of the cell (advance and height of the normal style), from the cached metrics.
+
+        :return: typing.Tuple[int, int]
+        """
+        ...
+
+    @property
+    def metrics(self) -> FontMetrics:
+        """
+        Get the metrics of the normal style.
+
+        :return: FontMetrics
+        """
+        return self.get_metrics(0)
+
+    @abc.abstractmethod
+    def get_metrics(self, style: int = 0) -> FontMetrics:
+        """
+        Get the metrics of a style, they are computed once per style and size of font.
+
+        :param style: Style (see kurses.stream.attributes).
+        :return: FontMetrics
+        """
+        ...
+
     @abc.abstractmethod
-    def size(self) -> typing.Tuple[int, int]: ...
+    def reload(self) -> None:
+        """
+        Open the font again (after a change of size), the caches of glyphs and metrics are invalidated.
+
+        :return: None
+        """
+        ...
 
     @property
     @abc.abstractmethod
@@ -68,4 +622,58 @@ class FontResources(abc.ABC, typing.Generic[R]):
     def clean_cache(self): ...
 
     @abc.abstractmethod
-    def present_chr(self, surface: R, _chr: kurses.stream.CharacterAttribute) -> R: ...
+    def destroy_texture(self, texture: R) -> None: ...
+
+    @abc.abstractmethod
+    def get_texture_bytes(self, texture: R) -> int: ...
+
+    @abc.abstractmethod
+    def is_glyph_cached(self, key: int) -> bool:
+        """
+        Get if the glyph is in the cache (or the persistent cache), without counting a hit or a miss.
+
+        :param key: Key of glyph (get_glyph_key).
+        :return: bool
+        """
+        ...
+
+    @abc.abstractmethod
+    def rasterize_glyph(self, key: int) -> R:
+        """
+        Rasterize the glyph into a CPU surface, it can be called from worker threads.
+
+        :param key: Key of glyph (get_glyph_key).
+        :return: Surface of glyph.
+        """
+        ...
+
+    @abc.abstractmethod
+    def upload_glyph(self, surface: R, key: int, glyph: R) -> None:
+        """
+        Upload the surface of glyph (rasterize_glyph) into the cache, the surface is released.
+
+        :param surface: Render surface.
+        :param key: Key of glyph.
+        :param glyph: Surface of glyph.
+        :return: None
+        """
+        ...
+
+    @abc.abstractmethod
+    def release_glyph(self, glyph: R) -> None: ...
+
+    @abc.abstractmethod
+    def present_chr(self, surface: R, _chr: kurses.stream.attributes.CharacterAttribute) -> typing.Optional[R]: ...
+
+    @abc.abstractmethod
+    def draw_chr(self, surface: R, _chr: kurses.stream.attributes.CharacterAttribute,
+                 rect: typing.Tuple[int, int, int, int]) -> bool:
+        """
+        Draw the character into the rect.
+
+        :param surface: Render surface.
+        :param _chr: Character attribute.
+        :param rect: Destination rect (x, y, w, h) in pixels.
+        :return: False if a placeholder was drawn (the glyph was deferred by the raster budget).
+        """
+        ...
@@ -0,0 +1,181 @@
+import glob
+import hashlib
+import mmap
+import os
+import struct
+import tempfile
+import typing
+
+MAGIC = b"KGLY"
+VERSION = 1
+
+HEADER_STRUCT = struct.Struct("<4sI20sI")
+ENTRY_STRUCT = struct.Struct("<QQIII")
+
+GlyphPixels = typing.Tuple[int, int, int, typing.Union[bytes, memoryview]]
+
+
+def get_default_cache_dir() -> str:
+    """
+    Get the default directory of the glyph caches ($XDG_CACHE_HOME/kurses or ~/.cache/kurses).
+
+    :return: str
+    """
+    return os.path.join(os.environ.get("XDG_CACHE_HOME", os.path.join(os.path.expanduser("~"), ".cache")), "kurses")
+
+
+def get_file_digest(filename: str) -> bytes:
+    with open(filename, "rb") as f:
+        return hashlib.sha1(f.read()).digest()
+
+
+class GlyphStore:
+    """
+    Persistent cache of rasterized glyphs, for a font (file, size, quality and encoding).
+
+    The glyphs are stored in one file (header, index and pixels) that is mapped in memory, the pixels are read without
+    copies. The name of file includes the hash of the font file, so the cache is invalidated when the font changes
+    and the caches of the previous versions of the font are removed.
+    """
+
+    def __init__(self, directory: str, font_filename: str, *variant: typing.Any):
+        """
+        GlyphStore constructor.
+
+        :param directory: Directory of the caches, it is created if it does not exist.
+        :param font_filename: Font source filename.
+        :param variant: Values that change the rasterization of the glyphs (ptsize, quality, encoding, ...).
+        """
+        self.__digest = get_file_digest(font_filename)
+
+        source = hashlib.sha1(os.path.abspath(font_filename).encode()).hexdigest()[:12]
+        suffix = "-".join(str(value) for value in variant)
+
+        self.__directory = directory
+        self.__pattern = os.path.join(directory, f"{source}-*-{suffix}.glyphs")
+        self.__filename = os.path.join(directory, f"{source}-{self.__digest.hex()[:16]}-{suffix}.glyphs")
+
+        self.__mmap: typing.Optional[mmap.mmap] = None
+        self.__glyphs: typing.Dict[int, GlyphPixels] = {}
+        self.__added: typing.Dict[int, GlyphPixels] = {}
+
+    @property
+    def filename(self) -> str:
+        return self.__filename
+
+    @property
+    def dirty(self) -> bool:
+        """
+        Get if there are glyphs that are not saved yet.
+
+        :return: bool
+        """
+        return bool(self.__added)
+
+    def __len__(self) -> int:
+        return len(self.__glyphs) + len(self.__added)
+
+    def __contains__(self, key: int) -> bool:
+        return key in self.__glyphs or key in self.__added
+
+    def load(self) -> typing.Dict[int, GlyphPixels]:
+        """
+        Map the cache file in memory.
+
+        :return: The glyphs (width, height, pitch and pixels as memoryview of the map) by key.
+        """
+        self.close()
+
+        if not os.path.isfile(self.__filename):
+            return {}
+
+        with open(self.__filename, "rb") as f:
+            try:
+                self.__mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+            except ValueError:
+                return {}
+
+        view = memoryview(self.__mmap)
+
+        try:
+            magic, version, digest, count = HEADER_STRUCT.unpack_from(view, 0)
+        except struct.error:
+            magic, version, digest, count = b"", 0, b"", 0
+
+        if magic != MAGIC or version != VERSION or digest != self.__digest:
+            view.release()
+            self.close()
+            return {}
+
+        for i in range(count):
+            key, offset, width, height, pitch = ENTRY_STRUCT.unpack_from(view, HEADER_STRUCT.size + i * ENTRY_STRUCT.size)
+            self.__glyphs[key] = width, height, pitch, view[offset:offset + pitch * height]
+
+        return dict(self.__glyphs)
+
+    def add(self, key: int, width: int, height: int, pitch: int, pixels: bytes):
+        """
+        Add a glyph rasterized in this session, it is written by save.
+
+        :param key: Key of glyph.
+        :param width: Width of glyph.
+        :param height: Height of glyph.
+        :param pitch: Bytes per row.
+        :param pixels: Pixels of glyph.
+        :return: None
+        """
+        if key not in self.__glyphs:
+            self.__added[key] = width, height, pitch, pixels
+
+    def save(self):
+        """
+        Write the cache file with the loaded and the added glyphs, and remove the caches of other versions of the font.
+
+        :return: None
+        """
+        if not self.__added:
+            return
+
+        glyphs = {**self.__glyphs, **self.__added}
+
+        os.makedirs(self.__directory, exist_ok=True)
+
+        offset = HEADER_STRUCT.size + len(glyphs) * ENTRY_STRUCT.size
+        index, data = [], []
+
+        for key, (width, height, pitch, pixels) in glyphs.items():
+            index.append(ENTRY_STRUCT.pack(key, offset, width, height, pitch))
+            data.append(pixels)
+            offset += pitch * height
+
+        fd, temporary = tempfile.mkstemp(dir=self.__directory, suffix=".tmp")
+
+        with os.fdopen(fd, "wb") as f:
+            f.write(HEADER_STRUCT.pack(MAGIC, VERSION, self.__digest, len(glyphs)))
+            f.writelines(index)
+            f.writelines(data)
+
+        os.replace(temporary, self.__filename)
+
+        for filename in glob.glob(self.__pattern):
+            if filename != self.__filename:
+                os.remove(filename)
+
+        self.close()
+        self.load()
+
+    def close(self):
+        for _, _, _, pixels in self.__glyphs.values():
+            if isinstance(pixels, memoryview):
+                pixels.release()
+
+        self.__glyphs = {}
+        self.__added = {}
+
+        if self.__mmap is not None:
+            try:
+                self.__mmap.close()
+            except BufferError:
+                pass
+
+            self.__mmap = None
@@ -1,4 +1,5 @@
 import collections
+import copy
 import math
 import typing
 
@@ -17,13 +18,47 @@ class GraphicsBuffer:
         self.__background_color: kurses.colors.Color = kwargs.get("background_color", (0, 0, 0))
         self.__primitives_figures: typing.Deque[typing.Union[
             PolygonFigure, CircleFigure, RectangleFigure, LineFigure, PrimitiveFigure]] = collections.deque()
+        self.__invalidated = False
 
     def __iter__(self):
+        self.__invalidated = False
+
         while bool(self.__primitives_figures):
             yield self.__primitives_figures.popleft()
 
+    def snapshot(self) -> "GraphicsBuffer":
+        """
+        Move the figures that are not drawn yet into a copy of the graphics buffer.
+
+        :return: GraphicsBuffer
+        """
+        graphics = copy.copy(self)
+        graphics.__primitives_figures = self.__primitives_figures
+        self.__primitives_figures = collections.deque()
+        self.__invalidated = False
+
+        return graphics
+
+    @property
+    def pending(self) -> bool:
+        """
+        Get if there are figures that are not drawn yet, or the buffer was invalidated.
+
+        :return: bool
+        """
+        return self.__invalidated or bool(self.__primitives_figures)
+
+    def invalidate(self) -> None:
+        """
+        Mark the graphics buffer as changed, to be drawn again.
+
+        :return: None
+        """
+        self.__invalidated = True
+
     def clear(self):
         self.__primitives_figures.clear()
+        self.__invalidated = True
 
     @property
     def background(self) -> kurses.colors.Color:
@@ -0,0 +1,52 @@
+import abc
+import typing
+
+
+class KeyboardInterface(abc.ABC):
+    """
+    Snapshot of the state of the keyboard, taken once per frame by update.
+    """
+
+    @abc.abstractmethod
+    def update(self):
+        pass
+
+    @abc.abstractmethod
+    def is_pressed(self, name: str) -> bool:
+        """
+        Get if the key is pressed in the snapshot.
+
+        :param name: Name of key (lower case).
+        :return: bool
+        """
+        pass
+
+    @property
+    @abc.abstractmethod
+    def pressed(self) -> typing.List[str]:
+        """
+        Get the names of the keys pressed in the snapshot.
+
+        :return: typing.List[str]
+        """
+        pass
+
+    @property
+    @abc.abstractmethod
+    def just_pressed(self) -> typing.Set[str]:
+        """
+        Get the names of the keys pressed since the previous snapshot.
+
+        :return: typing.Set[str]
+        """
+        pass
+
+    @property
+    @abc.abstractmethod
+    def just_released(self) -> typing.Set[str]:
+        """
+        Get the names of the keys released since the previous snapshot.
+
+        :return: typing.Set[str]
+        """
+        pass
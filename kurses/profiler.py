@@ -0,0 +1,146 @@
+import collections
+import time
+import typing
+
+DEFAULT_WINDOW_FRAMES = 120
+
+StatsType = typing.Dict[str, typing.Dict[str, float]]
+
+
+class FrameProfiler:
+    """
+    Profiler of the phases of the frames of the main loop, the timings and the counters of the last frames (window)
+    are kept to compute the statistics.
+
+    The phases are measured by laps, every lap measures the time since the previous lap (or the start of the frame):
+
+        profiler.begin()
+        poll_events()
+        profiler.lap("events")
+        update()
+        profiler.lap("update")
+        profiler.end(draw_calls=total_draw_calls)
+
+    When the profiler is disabled every call returns immediately.
+    """
+
+    def __init__(self, window: int = DEFAULT_WINDOW_FRAMES, enabled: bool = False):
+        """
+        FrameProfiler constructor.
+
+        :param window: Number of frames used to compute the statistics.
+        :param enabled: Enable the profiler.
+        """
+        self.enabled = enabled
+        self.__frames: typing.Deque[typing.Dict[str, float]] = collections.deque(maxlen=window)
+        self.__counters: typing.Deque[typing.Dict[str, int]] = collections.deque(maxlen=window)
+        self.__totals: typing.Dict[str, int] = {}
+        self.__current: typing.Dict[str, float] = {}
+        self.__start = 0.0
+        self.__last = 0.0
+
+    def begin(self) -> None:
+        """
+        Start a frame.
+
+        :return: None
+        """
+        if not self.enabled:
+            return
+
+        self.__current = {}
+        self.__start = self.__last = time.perf_counter()
+
+    def lap(self, phase: str) -> None:
+        """
+        Measure the time of a phase, since the previous lap. The laps of the same phase are added.
+
+        :param phase: Name of phase.
+        :return: None
+        """
+        if not self.enabled:
+            return
+
+        now = time.perf_counter()
+        self.__current[phase] = self.__current.get(phase, 0.0) + now - self.__last
+        self.__last = now
+
+    def end(self, **totals: int) -> None:
+        """
+        End the frame.
+
+        :param totals: Monotonic counters (glyphs created, draw calls, ...), the difference with the previous frame
+            is kept.
+        :return: None
+        """
+        if not self.enabled:
+            return
+
+        self.__current["frame"] = time.perf_counter() - self.__start
+        self.__frames.append(self.__current)
+        self.__counters.append({name: value - self.__totals.get(name, value) for name, value in totals.items()})
+        self.__totals = totals
+
+    def reset(self) -> None:
+        """
+        Remove the frames of the window.
+
+        :return: None
+        """
+        self.__frames.clear()
+        self.__counters.clear()
+        self.__totals = {}
+
+    @property
+    def frames(self) -> int:
+        return len(self.__frames)
+
+    @staticmethod
+    def __summarize(frames: typing.Iterable[typing.Mapping[str, float]]) -> StatsType:
+        values: typing.Dict[str, typing.List[float]] = {}
+
+        for frame in frames:
+            for name, value in frame.items():
+                values.setdefault(name, []).append(value)
+
+        return {
+            name: {"mean": sum(samples) / len(samples), "max": max(samples), "last": samples[-1]}
+            for name, samples in values.items()
+        }
+
+    @property
+    def timings(self) -> StatsType:
+        """
+        Get the time (seconds) of the phases in the window: mean, max and last frame.
+
+        :return: StatsType
+        """
+        return self.__summarize(self.__frames)
+
+    @property
+    def counters(self) -> StatsType:
+        """
+        Get the counters per frame in the window: mean, max and last frame.
+
+        :return: StatsType
+        """
+        return self.__summarize(self.__counters)
+
+    @property
+    def stats(self) -> typing.Dict[str, typing.Any]:
+        return {"frames": self.frames, "timings": self.timings, "counters": self.counters}
+
+    def report(self) -> typing.List[str]:
+        """
+        Get the statistics as lines of text, for the overlay.
+
+        :return: typing.List[str]
+        """
+        timings, counters = self.timings, self.counters
+
+        lines = [
+            " ".join(f"{name} {stats['mean'] * 1000.0:.2f}ms" for name, stats in timings.items()),
+            " ".join(f"{name} {stats['mean']:.0f}" for name, stats in counters.items()),
+        ]
+
+        return [line for line in lines if line]
@@ -26,3 +26,12 @@ class Buzzer(abc.ABC):
     @abc.abstractmethod
     def update(self):
         ...
+
+    @abc.abstractmethod
+    def close(self):
+        """
+        Close the audio device, the buzzer can not be used after it.
+
+        :return: None
+        """
+        ...
@@ -1,12 +1,34 @@
-import collections
+import copy
+import itertools
 import typing
 
 import kurses.colors
-from kurses.stream.attributes import TypeCursor, CharacterAttribute, RectangleAttribute
-from kurses.stream.buffer import BufferMatrix
+from kurses.stream.attributes import TypeCursor, RectangleAttribute, STYLE_BOLD, STYLE_ITALIC, \
+    STYLE_UNDERLINE, STYLE_STRIKETHROUGH
+from kurses.stream.buffer import BufferMatrix, clip_region, subtract_region
+from kurses.stream.style import StyleTable
+
+if typing.TYPE_CHECKING:
+    import numpy as np
 
 DEFAULT_PTSIZE = 16
 
+# Characters of the borders of box: top-left, top-right, bottom-left and bottom-right corners, horizontal and vertical.
+BOX_SINGLE = "\u250c\u2510\u2514\u2518\u2500\u2502"
+BOX_DOUBLE = "\u2554\u2557\u255a\u255d\u2550\u2551"
+BOX_ASCII = "++++-|"
+
+# Max number of scrolls logged between two reads of the log, the log is dropped if it is not read (see pop_scrolls).
+MAX_SCROLL_LOG = 64
+
+ScrollType = typing.Tuple[int, int, int]
+
+__stream_ids = itertools.count()
+
+
+def get_stream_id() -> int:
+    return next(__stream_ids)
+
 
 class StreamBuffer:
     def __init__(self, columns: int, rows: int, **kwargs):
@@ -33,6 +55,10 @@ class StreamBuffer:
         :type cursor_color: kurses.colors.TupleColor
         :keyword type_cursor: Select type cursor, with default value Line.
         :type type_cursor: TypeCursor
+        :keyword matrix: Engine of the buffer matrix, with default value BufferMatrix (see kurses.stream.array).
+        :type matrix: typing.Type[BufferMatrix]
+        :keyword styles: Table of the styles of the characters, with default value a new table.
+        :type styles: StyleTable
         """
         self.__bold = False
         self.__italic = False
@@ -51,24 +77,86 @@ class StreamBuffer:
         self.cursor_color: kurses.colors.TupleColor = kwargs.get("cursor_color", (128, 128, 128))
         self.type_cursor: TypeCursor = kwargs.get("type_cursor", TypeCursor.LINE)
 
+        self.__uid = get_stream_id()
         self.__current_position = 0, 0
-        self.__queue: typing.Deque = collections.deque()
         self.__flag_ready = False
+        self.__pending = True
+        self.__scroll_region: typing.Optional[typing.Tuple[int, int]] = None
+        self.__scrolls: typing.Optional[typing.List[ScrollType]] = []
+
+        styles: typing.Optional[StyleTable] = kwargs.get("styles", None)
+
+        self.__styles: StyleTable = StyleTable() if styles is None else styles
+        self.__style_id: typing.Optional[int] = None
+        self.__style_scale = self.sx, self.sy
+        self.__style_generation = self.__styles.generation
 
         shape = rows, columns
-        self.__buffer_matrix = BufferMatrix(shape)
+        self.__buffer_matrix = kwargs.get("matrix", BufferMatrix)(shape, self.__styles)
 
     def __iter__(self):
-        while len(self.__queue) > 0:
-            yield self.__queue.popleft()
+        return iter(self.__buffer_matrix)
 
     @property
     def buffer(self):
-        for attr in self:
-            self.__buffer_matrix[attr.x, attr.y] = attr
+        """
+        Get the buffer matrix, the writes go straight into the matrix so it is always up to date.
+
+        :return: BufferMatrix
+        """
+        self.__pending = False
 
         return self.__buffer_matrix
 
+    @property
+    def uid(self) -> int:
+        """
+        Get the identifier of the virtual stream, shared with its snapshots.
+
+        :return: int
+        """
+        return self.__uid
+
+    def snapshot(self) -> "StreamBuffer":
+        """
+        Copy the virtual stream with the characters written until now, the copy is not modified by the next writes.
+        The changes pending to be presented are moved into the copy.
+
+        :return: StreamBuffer
+        """
+        stream = copy.copy(self)
+        stream.__buffer_matrix = self.__buffer_matrix.copy()
+        stream.__scrolls = self.pop_scrolls()
+        self.__pending = False
+
+        return stream
+
+    @property
+    def styles(self) -> StyleTable:
+        """
+        Get the table of the styles of the characters of the virtual stream.
+
+        :return: StyleTable
+        """
+        return self.__styles
+
+    @property
+    def pending(self) -> bool:
+        """
+        Get if the virtual stream changed since the last time that the buffer was read.
+
+        :return: bool
+        """
+        return self.__pending
+
+    def invalidate(self) -> None:
+        """
+        Mark the virtual stream as changed, to be drawn again.
+
+        :return: None
+        """
+        self.__pending = True
+
     def resize(self, columns: int, rows: int) -> None:
         """
         Resize (columns and rows) virtual stream.
@@ -78,6 +166,7 @@ class StreamBuffer:
         :return: None
         """
         self.__buffer_matrix.reshape((rows, columns))
+        self.__pending = True
 
     def getbuffersize(self) -> typing.Tuple[int, int]:
         """
@@ -134,8 +223,8 @@ class StreamBuffer:
 
         :return: None
         """
-        self.__queue.clear()
         self.__buffer_matrix.clear()
+        self.__pending = True
 
     def wherex(self):
         """
@@ -186,6 +275,7 @@ class StreamBuffer:
         self.__strikethrough = False
         self.__foreign_color = 255, 255, 255
         self.__background_color = 0, 0, 0
+        self.__style_id = None
 
     def set_background_color(self, color: kurses.colors.Color) -> None:
         """
@@ -199,6 +289,7 @@ class StreamBuffer:
             color = kurses.colors.hex_to_rgb(color)
 
         self.__background_color = color
+        self.__style_id = None
 
     def set_foreign_color(self, color: kurses.colors.Color) -> None:
         """
@@ -212,6 +303,7 @@ class StreamBuffer:
             color = kurses.colors.hex_to_rgb(color)
 
         self.__foreign_color = color
+        self.__style_id = None
 
     def bold(self, _bool: bool):
         """
@@ -221,6 +313,7 @@ class StreamBuffer:
         :return: None
         """
         self.__bold = _bool
+        self.__style_id = None
 
     def italic(self, _bool: bool):
         """
@@ -230,6 +323,7 @@ class StreamBuffer:
         :return: None
         """
         self.__italic = _bool
+        self.__style_id = None
 
     def underline(self, _bool: bool):
         """
@@ -239,6 +333,7 @@ class StreamBuffer:
         :return: None
         """
         self.__underline = _bool
+        self.__style_id = None
 
     def strikethrough(self, _bool: bool):
         """
@@ -248,21 +343,33 @@ class StreamBuffer:
         :return: None
         """
         self.__strikethrough = _bool
+        self.__style_id = None
 
-    def __create_character_attr(self, _chr, x, y):
-        return CharacterAttribute(
-            code=_chr,
-            x=x,
-            y=y,
-            foreign=self.__foreign_color,
-            background=self.__background_color,
-            bold=self.__bold,
-            italic=self.__italic,
-            underline=self.__underline,
-            strikethrough=self.__strikethrough,
-            sx=self.sx,
-            sy=self.sy
-        )
+    def __get_style_id(self) -> int:
+        """
+        Get the identifier of the current style, it is interned again only after a setter, the scale or the generation
+        of the table (the identifier can be freed by a compaction) changed.
+        """
+        if self.__style_id is None or self.__style_scale != (self.sx, self.sy) or \
+                self.__style_generation != self.__styles.generation:
+            style = (
+                (STYLE_BOLD if self.__bold else 0) |
+                (STYLE_ITALIC if self.__italic else 0) |
+                (STYLE_UNDERLINE if self.__underline else 0) |
+                (STYLE_STRIKETHROUGH if self.__strikethrough else 0)
+            )
+
+            self.__style_scale = self.sx, self.sy
+            self.__style_generation = self.__styles.generation
+            self.__style_id = self.__styles.intern(
+                self.__foreign_color, self.__background_color, style, 0, self.sx, self.sy
+            )
+
+        return self.__style_id
+
+    def __put_text(self, x: int, y: int, text: str):
+        self.__buffer_matrix.put_text(x, y, text, self.__get_style_id())
+        self.__pending = True
 
     def cputs(self, _chr: str):
         """
@@ -273,7 +380,7 @@ class StreamBuffer:
         :return: None
         """
         x, y = self.__current_position
-        self.__queue.appendleft(self.__create_character_attr(_chr, x, y))
+        self.__put_text(x, y, _chr)
         self.gotoxy(x + 1, y)
 
     def print(self, _str: str):
@@ -299,7 +406,7 @@ class StreamBuffer:
         :return: None
         """
         self.__current_position = x, y
-        self.__queue.appendleft(self.__create_character_attr(ord(_chr), x, y))
+        self.__put_text(x, y, _chr)
 
     def cputsxy(self, x: int, y: int, _str: str) -> None:
         """
@@ -313,22 +420,331 @@ class StreamBuffer:
         :type _str: str
         :return: None
         """
-        _x = x
+        lines = _str.split("\n")
+
+        for i, line in enumerate(lines):
+            if line:
+                self.__put_text(x, y + i, line)
+
+        self.gotoxy(x + len(lines[-1]), y + len(lines) - 1)
+
+    def fill(self, x: int, y: int, w: int, h: int, _chr: str = " ", style: typing.Optional[int] = None) -> None:
+        """
+        Fill a region of virtual stream with a character, the region is clipped to the stream.
+
+        :param x: X-axis position.
+        :type x: int
+        :param y: Y-axis position.
+        :type y: int
+        :param w: Width of region.
+        :type w: int
+        :param h: Height of region.
+        :type h: int
+        :param _chr: Character, with default value space.
+        :type _chr: str
+        :param style: Identifier of the style (see StreamBuffer.styles), with default value the current style.
+        :type style: typing.Optional[int]
+        :return: None
+        """
+        self.__buffer_matrix.fill_region(x, y, w, h, ord(_chr), self.__get_style_id() if style is None else style)
+        self.__pending = True
+
+    def blit_codes(self, x: int, y: int, codes: typing.Union["np.ndarray", typing.Sequence[str]],
+                   foreign: typing.Optional["np.ndarray"] = None,
+                   background: typing.Optional["np.ndarray"] = None) -> None:
+        """
+        Write a region of characters in one call, the region is clipped to the stream.
+
+        The colors of the cells are interned once per different pair of colors, the other attributes are the current
+        ones of the stream.
+
+        :param x: X-axis position.
+        :type x: int
+        :param y: Y-axis position.
+        :type y: int
+        :param codes: Character codes (rows and columns), or the lines (with the same length) of the region.
+        :type codes: typing.Union[np.ndarray, typing.Sequence[str]]
+        :param foreign: Foreign colors (rows, columns and RGB), with default value the current foreign color.
+        :type foreign: typing.Optional[np.ndarray]
+        :param background: Background colors (rows, columns and RGB), with default value the current background
+            color.
+        :type background: typing.Optional[np.ndarray]
+        :return: None
+        """
+        import numpy as np
+
+        if isinstance(codes, np.ndarray):
+            codes = codes.astype(np.uint32, copy=False)
+        else:
+            codes = np.array([np.frombuffer(line.encode("utf-32-le"), dtype=np.uint32) for line in codes],
+                             dtype=np.uint32)
+
+        if codes.ndim != 2:
+            raise ValueError(f"The codes must be a 2D array (rows and columns), not {codes.ndim}D")
+
+        if foreign is None and background is None:
+            style_ids = np.full(codes.shape, self.__get_style_id(), dtype=np.uint32)
+        else:
+            style_ids = self.__intern_colors(codes.shape, foreign, background)
+
+        self.__buffer_matrix.put_region(x, y, codes, style_ids)
+        self.__pending = True
+
+    def __intern_colors(self, shape: typing.Tuple[int, int], foreign: typing.Optional["np.ndarray"],
+                        background: typing.Optional["np.ndarray"]) -> "np.ndarray":
+        import numpy as np
+
+        style_id = self.__get_style_id()
+
+        # The pair of colors of each cell is packed into the bytes of an integer, to intern each pair once.
+        pairs = np.zeros(shape + (8,), dtype=np.uint8)
+        pairs[..., 0:3] = self.__foreign_color if foreign is None else foreign
+        pairs[..., 3:6] = self.__background_color if background is None else background
+
+        values, inverse = np.unique(pairs.view(np.uint64)[..., 0], return_inverse=True)
+
+        style = self.__styles[style_id].style
+
+        with self.__styles.batch():
+            ids = np.array([
+                self.__styles.intern(
+                    (value[0], value[1], value[2]), (value[3], value[4], value[5]), style, 0, self.sx, self.sy
+                )
+                for value in values.view(np.uint8).reshape(-1, 8).tolist()
+            ], dtype=np.uint32)
+
+        return ids[inverse].reshape(shape)
+
+    def hline(self, x: int, y: int, length: int, _chr: str = BOX_SINGLE[4]) -> None:
+        """
+        Draw a horizontal line into virtual stream, with the current style.
+
+        :param x: X-axis position.
+        :type x: int
+        :param y: Y-axis position.
+        :type y: int
+        :param length: Length of line.
+        :type length: int
+        :param _chr: Character, with default value the horizontal line of BOX_SINGLE.
+        :type _chr: str
+        :return: None
+        """
+        self.fill(x, y, length, 1, _chr)
+
+    def vline(self, x: int, y: int, length: int, _chr: str = BOX_SINGLE[5]) -> None:
+        """
+        Draw a vertical line into virtual stream, with the current style.
+
+        :param x: X-axis position.
+        :type x: int
+        :param y: Y-axis position.
+        :type y: int
+        :param length: Length of line.
+        :type length: int
+        :param _chr: Character, with default value the vertical line of BOX_SINGLE.
+        :type _chr: str
+        :return: None
+        """
+        self.fill(x, y, 1, length, _chr)
+
+    def box(self, x: int, y: int, w: int, h: int, border: str = BOX_SINGLE) -> None:
+        """
+        Draw the border of a box into virtual stream, with the current style.
+
+        :param x: X-axis position.
+        :type x: int
+        :param y: Y-axis position.
+        :type y: int
+        :param w: Width of box.
+        :type w: int
+        :param h: Height of box.
+        :type h: int
+        :param border: Characters of the border (see BOX_SINGLE), with default value BOX_SINGLE.
+        :type border: str
+        :return: None
+        """
+        if w <= 0 or h <= 0:
+            return
+
+        top_left, top_right, bottom_left, bottom_right = border[0], border[1], border[2], border[3]
+        horizontal, vertical = border[4], border[5]
+
+        self.hline(x + 1, y, w - 2, horizontal)
+        self.hline(x + 1, y + h - 1, w - 2, horizontal)
+        self.vline(x, y + 1, h - 2, vertical)
+        self.vline(x + w - 1, y + 1, h - 2, vertical)
+
+        self.fill(x + w - 1, y + h - 1, 1, 1, bottom_right)
+        self.fill(x, y + h - 1, 1, 1, bottom_left)
+        self.fill(x + w - 1, y, 1, 1, top_right)
+        self.fill(x, y, 1, 1, top_left)
+
+    def blit(self, src: "StreamBuffer", src_rect: typing.Optional[typing.Tuple[int, int, int, int]] = None,
+             dst_xy: typing.Tuple[int, int] = (0, 0)) -> None:
+        """
+        Copy a region of other virtual stream (or of this one) into virtual stream, the region is clipped to both
+        streams.
+
+        :param src: Source virtual stream.
+        :type src: StreamBuffer
+        :param src_rect: Region of source (x, y, w and h), with default value the whole source.
+        :type src_rect: typing.Optional[typing.Tuple[int, int, int, int]]
+        :param dst_xy: Position of region (x and y), with default value 0, 0.
+        :type dst_xy: typing.Tuple[int, int]
+        :return: None
+        """
+        if src_rect is None:
+            rows, columns = src.shape
+            src_rect = 0, 0, columns, rows
+
+        self.__buffer_matrix.blit(src.__buffer_matrix, src_rect, dst_xy)
+        self.__pending = True
+
+    def move_region(self, src_rect: typing.Tuple[int, int, int, int], dst_xy: typing.Tuple[int, int]) -> None:
+        """
+        Move a region of virtual stream, the cells of the region that are not covered by the destination are cleared.
+
+        :param src_rect: Region (x, y, w and h).
+        :type src_rect: typing.Tuple[int, int, int, int]
+        :param dst_xy: Position of destination (x and y).
+        :type dst_xy: typing.Tuple[int, int]
+        :return: None
+        """
+        x, y, w, h = src_rect
+        dx, dy = dst_xy
+        region = clip_region(self.shape, x, y, w, h)
+
+        if region is None:
+            return
+
+        x0, y0, x1, y1 = region
+
+        self.__buffer_matrix.blit(self.__buffer_matrix, src_rect, dst_xy)
+
+        for part in subtract_region((x0, y0, x1 - x0, y1 - y0), (x0 + dx - x, y0 + dy - y, x1 - x0, y1 - y0)):
+            self.__buffer_matrix.clear_region(*part)
+
+        self.__pending = True
+
+    @property
+    def scroll_region(self) -> typing.Tuple[int, int]:
+        """
+        Get the first and the last rows of the scroll region, with default value all the rows.
+
+        :return: typing.Tuple[int, int]
+        """
+        rows, _ = self.shape
+
+        if self.__scroll_region is None:
+            return 0, rows - 1
+
+        top, bottom = self.__scroll_region
+
+        return min(top, rows - 1), min(bottom, rows - 1)
+
+    def set_scroll_region(self, top: typing.Optional[int] = None, bottom: typing.Optional[int] = None) -> None:
+        """
+        Set the rows (both included) scrolled by scroll, insline and delline, without rows to reset it to all the rows.
+
+        :param top: First row, with default value 0.
+        :type top: typing.Optional[int]
+        :param bottom: Last row, with default value the last row of virtual stream.
+        :type bottom: typing.Optional[int]
+        :return: None
+        """
+        rows, _ = self.shape
+
+        if top is None and bottom is None:
+            self.__scroll_region = None
+            return
+
+        top = 0 if top is None else top
+        bottom = rows - 1 if bottom is None else bottom
+
+        if not 0 <= top <= bottom < rows:
+            raise ValueError(f"The scroll region ({top}, {bottom}) is out of the rows of the stream (0, {rows - 1})")
+
+        self.__scroll_region = top, bottom
+
+    def scroll(self, lines: int = 1) -> None:
+        """
+        Scroll the scroll region, the rows uncovered are cleared.
+
+        :param lines: Number of rows, up if it is positive and down if it is negative, with default value 1.
+        :type lines: int
+        :return: None
+        """
+        top, bottom = self.scroll_region
 
-        for _chr in _str:
-            if _chr in "\n":
-                y += 1
-                x = _x
-                continue
+        self.__scroll(top, bottom + 1, lines)
 
-            self.putchxy(x, y, _chr)
+    def insline(self) -> None:
+        """
+        Insert an empty row at the row of cursor, the rows below it are scrolled down into the scroll region.
+
+        :return: None
+        """
+        top, bottom = self.scroll_region
+        y = self.wherey()
+
+        if top <= y <= bottom:
+            self.__scroll(y, bottom + 1, -1)
+
+    def delline(self) -> None:
+        """
+        Delete the row of cursor, the rows below it are scrolled up into the scroll region.
+
+        :return: None
+        """
+        top, bottom = self.scroll_region
+        y = self.wherey()
+
+        if top <= y <= bottom:
+            self.__scroll(y, bottom + 1, 1)
 
-            x += 1
+    def __scroll(self, top: int, bottom: int, lines: int):
+        _, columns = self.shape
+        height = bottom - top
+        lines = max(-height, min(lines, height))
 
-        if isinstance(_x, str):
-            raise ""
+        if lines == 0:
+            return
 
-        self.gotoxy(x, y)
+        if abs(lines) == height:
+            self.__buffer_matrix.clear_region(0, top, columns, height)
+        elif lines > 0:
+            self.move_region((0, top + lines, columns, height - lines), (0, top))
+        else:
+            self.move_region((0, top, columns, height + lines), (0, top - lines))
+
+        self.__pending = True
+
+        if self.__scrolls is None:
+            return
+
+        # The scrolls of the same region are merged, the surfaces only need the total.
+        if self.__scrolls and self.__scrolls[-1][:2] == (top, bottom):
+            lines = max(-height, min(lines + self.__scrolls.pop()[2], height))
+
+        if lines == 0:
+            return
+
+        if len(self.__scrolls) >= MAX_SCROLL_LOG:
+            self.__scrolls = None
+        else:
+            self.__scrolls.append((top, bottom, lines))
+
+    def pop_scrolls(self) -> typing.List[ScrollType]:
+        """
+        Get and clear the log of the scrolls (first row, last row excluded and number of rows) since the last call,
+        for the surfaces that move the rows already drawn instead of drawing them again.
+
+        :return: typing.List[ScrollType]
+        """
+        scrolls = self.__scrolls or []
+        self.__scrolls = []
+
+        return scrolls
 
     def putrect(self, x: int, y: int, w: int, h: int):
         """
@@ -344,13 +760,12 @@ class StreamBuffer:
         :type h: int
         :return: None
         """
-        self.__queue.appendleft(
-            RectangleAttribute(
-                x, y,
-                w, h,
-                self.__background_color
-            )
+        self.__buffer_matrix[x, y] = RectangleAttribute(
+            x, y,
+            w, h,
+            self.__background_color
         )
+        self.__pending = True
 
     def preset(self):
         self.__flag_ready = True
@@ -0,0 +1,403 @@
+import copy
+import dataclasses
+import typing
+
+import numpy as np
+
+from kurses.stream.attributes import CharacterAttribute, RectangleAttribute
+from kurses.stream.buffer import fix_position_attribute, get_row_spans, clip_region, clip_blit, \
+    copy_region_attributes
+from kurses.stream.style import Style, StyleTable
+
+EMPTY_CODE = 0
+
+# State of the matrix compared by diff: the generation of the style table, the codes and the identifiers of the styles.
+StateType = typing.Tuple[int, np.ndarray, np.ndarray]
+
+
+def wrap_positions(shape: typing.Tuple[int, int], xs: np.ndarray, ys: np.ndarray) -> typing.Tuple[
+    np.ndarray, np.ndarray]:
+    """
+    Vectorized version of fix_position_attribute, wrap the X-axis positions into the rows of the matrix.
+
+    :param shape: Shape of matrix (rows and columns).
+    :param xs: X-axis positions.
+    :param ys: Y-axis positions.
+    :return: typing.Tuple[np.ndarray, np.ndarray]
+    """
+    rows, columns = shape
+    period = columns + 1
+
+    xs = np.asarray(xs, dtype=np.int64)
+    ys = np.asarray(ys, dtype=np.int64)
+
+    lines = np.where(xs >= columns, (xs - columns) // period + 1, 0)
+    lines = np.where(xs < 0, -((period - 1 - xs) // period), lines)
+
+    return xs - lines * period, ys + lines
+
+
+class ArrayBufferMatrix:
+    """
+    Buffer matrix stored as parallel NumPy arrays (structure of arrays), the code of the character and the identifier
+    of its style (see kurses.stream.style) per cell.
+
+    Same interface as BufferMatrix, the cells are materialized as CharacterAttribute only when they are read.
+    """
+
+    def __init__(self, shape: typing.Tuple[int, int], styles: typing.Optional[StyleTable] = None):
+        rows, columns = shape
+
+        self.__rows: int = rows
+        self.__cols: int = columns
+        self.__styles: StyleTable = StyleTable() if styles is None else styles
+        self.__rectangles: typing.Dict[typing.Tuple[int, int], RectangleAttribute] = {}
+
+        self.__codes, self.__style_ids = self.__allocate(shape)
+
+        self.__styles.register(self)
+
+    @staticmethod
+    def __allocate(shape: typing.Tuple[int, int]):
+        return (
+            np.zeros(shape, dtype=np.uint32),
+            np.zeros(shape, dtype=np.uint32),
+        )
+
+    @property
+    def cols(self) -> int:
+        return self.__cols
+
+    @property
+    def rows(self) -> int:
+        return self.__rows
+
+    @property
+    def style_table(self) -> StyleTable:
+        return self.__styles
+
+    @property
+    def codes(self) -> np.ndarray:
+        return self.__codes
+
+    @property
+    def style_ids(self) -> np.ndarray:
+        return self.__style_ids
+
+    def __get_style_values(self, name: str, dtype) -> np.ndarray:
+        values = np.array([getattr(_style, name) for _style in self.__styles] or [getattr(Style(), name)], dtype=dtype)
+
+        return values[self.__style_ids]
+
+    @property
+    def foreign(self) -> np.ndarray:
+        return self.__get_style_values("foreign", np.uint8)
+
+    @property
+    def background(self) -> np.ndarray:
+        return self.__get_style_values("background", np.uint8)
+
+    @property
+    def styles(self) -> np.ndarray:
+        return self.__get_style_values("style", np.uint8)
+
+    @property
+    def nbytes(self) -> int:
+        return sum(array.nbytes for array in self.__arrays)
+
+    @property
+    def __arrays(self) -> typing.Tuple[np.ndarray, ...]:
+        return self.__codes, self.__style_ids
+
+    def __in_bounds(self, x: int, y: int) -> bool:
+        return 0 <= x < self.__cols and 0 <= y < self.__rows
+
+    def __setitem__(self, index: typing.Tuple[int, int], value: typing.Union[CharacterAttribute, RectangleAttribute]):
+        x, y = 0, 0
+
+        if isinstance(index, tuple):
+            x, y = index
+
+        (x, y), value = fix_position_attribute(self.shape, (x, y), value)
+
+        if not self.__in_bounds(x, y):
+            return
+
+        if isinstance(value, RectangleAttribute):
+            self.__codes[y, x] = EMPTY_CODE
+            self.__rectangles[x, y] = value
+            return
+
+        self.__rectangles.pop((x, y), None)
+
+        self.__codes[y, x] = value.code
+        self.__style_ids[y, x] = self.__styles.intern_attribute(value)
+
+    def put_text(self, x: int, y: int, text: str, style_id: int):
+        """
+        Write a run of characters with the same style from a position, one slice assignment per array and row (the
+        characters are not materialized as CharacterAttribute).
+
+        :param x: X-axis position of the first character.
+        :param y: Y-axis position of the first character.
+        :param text: Characters.
+        :param style_id: Identifier of the style in the style table of the matrix.
+        :return: None
+        """
+        codes = np.frombuffer(text.encode("utf-32-le"), dtype=np.uint32)
+
+        for _y, _x, offset, count in get_row_spans(self.shape, (x, y), len(text)):
+            cells = _y, slice(_x, _x + count)
+
+            self.__codes[cells] = codes[offset:offset + count]
+            self.__style_ids[cells] = style_id
+
+            if self.__rectangles:
+                for i in range(_x, _x + count):
+                    self.__rectangles.pop((i, _y), None)
+
+    def __pop_rectangles(self, x0: int, y0: int, x1: int, y1: int):
+        for position in [(x, y) for x, y in self.__rectangles if x0 <= x < x1 and y0 <= y < y1]:
+            del self.__rectangles[position]
+
+    def fill_region(self, x: int, y: int, w: int, h: int, code: int, style_id: int):
+        """
+        Fill a region with a character, the region is clipped to the matrix.
+
+        :param x: X-axis position of region.
+        :param y: Y-axis position of region.
+        :param w: Width of region.
+        :param h: Height of region.
+        :param code: Character code.
+        :param style_id: Identifier of the style in the style table of the matrix.
+        :return: None
+        """
+        region = clip_region(self.shape, x, y, w, h)
+
+        if region is None:
+            return
+
+        x0, y0, x1, y1 = region
+
+        self.__codes[y0:y1, x0:x1] = code
+        self.__style_ids[y0:y1, x0:x1] = style_id
+        self.__pop_rectangles(x0, y0, x1, y1)
+
+    def put_region(self, x: int, y: int, codes: np.ndarray, style_ids: np.ndarray):
+        """
+        Write a region of characters from 2D arrays (rows and columns) of codes and style identifiers, the region is
+        clipped to the matrix.
+
+        :param x: X-axis position of region.
+        :param y: Y-axis position of region.
+        :param codes: Character codes.
+        :param style_ids: Identifiers of the styles in the style table of the matrix.
+        :return: None
+        """
+        h, w = codes.shape
+        region = clip_region(self.shape, x, y, w, h)
+
+        if region is None:
+            return
+
+        x0, y0, x1, y1 = region
+        src = slice(y0 - y, y1 - y), slice(x0 - x, x1 - x)
+
+        self.__codes[y0:y1, x0:x1] = codes[src]
+        self.__style_ids[y0:y1, x0:x1] = style_ids[src]
+        self.__pop_rectangles(x0, y0, x1, y1)
+
+    def clear_region(self, x: int, y: int, w: int, h: int):
+        """
+        Remove the characters and the rectangles of a region, the region is clipped to the matrix.
+
+        :param x: X-axis position of region.
+        :param y: Y-axis position of region.
+        :param w: Width of region.
+        :param h: Height of region.
+        :return: None
+        """
+        region = clip_region(self.shape, x, y, w, h)
+
+        if region is None:
+            return
+
+        x0, y0, x1, y1 = region
+
+        self.__codes[y0:y1, x0:x1] = EMPTY_CODE
+        self.__pop_rectangles(x0, y0, x1, y1)
+
+    def blit(self, src: "ArrayBufferMatrix", src_rect: typing.Tuple[int, int, int, int],
+             dst_xy: typing.Tuple[int, int]):
+        """
+        Copy a region of a matrix (it can be the same matrix, the regions can overlap), the region is clipped to both
+        matrices. The styles are interned in the table of the matrix if the tables are different.
+
+        :param src: Source matrix.
+        :param src_rect: Region of source (x, y, w and h).
+        :param dst_xy: Position of region in the matrix (x and y).
+        :return: None
+        """
+        region = clip_blit(src.shape, self.shape, src_rect, dst_xy)
+
+        if region is None:
+            return
+
+        x, y, dx, dy, w, h = region
+
+        if not isinstance(src, ArrayBufferMatrix):
+            copy_region_attributes(src, self, x, y, dx, dy, w, h)
+            return
+
+        # NumPy copies the slices that overlap (same matrix) before writing.
+        codes = src.__codes[y:y + h, x:x + w]
+        style_ids = src.__style_ids[y:y + h, x:x + w]
+        rectangles = [
+            dataclasses.replace(rect, x=rect.x - x + dx, y=rect.y - y + dy) for rect in src.__rectangles.values() if
+            x <= rect.x < x + w and y <= rect.y < y + h
+        ]
+
+        if src.__styles is not self.__styles:
+            values, inverse = np.unique(np.where(codes != EMPTY_CODE, style_ids, 0), return_inverse=True)
+            styles = self.__styles.import_styles(
+                src.__styles, [style_id for style_id in values.tolist() if style_id < len(src.__styles)]
+            )
+            style_ids = np.array([styles.get(style_id, 0) for style_id in values.tolist()],
+                                 dtype=np.uint32)[inverse].reshape(codes.shape)
+
+        self.__codes[dy:dy + h, dx:dx + w] = codes
+        self.__style_ids[dy:dy + h, dx:dx + w] = style_ids
+        self.__pop_rectangles(dx, dy, dx + w, dy + h)
+
+        for rect in rectangles:
+            self.__rectangles[rect.x, rect.y] = rect
+
+    def __getitem__(self, index: typing.Tuple[int, int]) -> typing.Union[CharacterAttribute, RectangleAttribute, None]:
+        x, y = index
+
+        code = int(self.__codes[y, x])
+
+        if code == EMPTY_CODE:
+            return self.__rectangles.get((x, y), None)
+
+        return self.__styles.create_character_attr(x, y, code, int(self.__style_ids[y, x]))
+
+    def clear(self):
+        self.__codes.fill(EMPTY_CODE)
+        self.__rectangles.clear()
+
+    def reshape(self, shape: typing.Tuple[int, int]):
+        ys, xs = np.nonzero(self.__codes)
+        values = [array[ys, xs] for array in self.__arrays]
+        rectangles = list(self.__rectangles.values())
+
+        self.__rows, self.__cols = shape
+        self.__rectangles = {}
+
+        arrays = self.__allocate(shape)
+        self.__codes, self.__style_ids = arrays
+
+        xs, ys = wrap_positions(shape, xs, ys)
+        inside = (xs >= 0) & (xs < self.__cols) & (ys >= 0) & (ys < self.__rows)
+
+        for array, value in zip(arrays, values):
+            array[ys[inside], xs[inside]] = value[inside]
+
+        for rect in rectangles:
+            self[rect.x, rect.y] = copy.copy(rect)
+
+    def copy(self) -> "ArrayBufferMatrix":
+        """
+        Copy the matrix, the rectangles and the style table are shared because they are not modified once they are in
+        the matrix.
+
+        :return: ArrayBufferMatrix
+        """
+        matrix = copy.copy(self)
+        matrix.__rectangles = dict(self.__rectangles)
+        matrix.__codes, matrix.__style_ids = (array.copy() for array in self.__arrays)
+
+        self.__styles.register(matrix)
+
+        return matrix
+
+    def get_used_style_ids(self) -> typing.List[int]:
+        """
+        Get the identifiers of the styles used by the characters, for the compactions of the style table.
+
+        :return: typing.List[int]
+        """
+        return np.unique(self.__style_ids[self.__codes != EMPTY_CODE]).tolist()
+
+    def rectangles(self) -> typing.List[RectangleAttribute]:
+        return list(self.__rectangles.values())
+
+    def diff(self, previous: typing.Optional[StateType]) -> typing.Tuple[
+        StateType, typing.List[typing.Tuple[int, int]]]:
+        """
+        Compare the characters of the matrix with a previous state, the codes and the identifiers of the styles are
+        compared as they are (the styles are interned with the exact colors), the style of the empty cells is ignored.
+
+        :param previous: State returned by the previous call, or None.
+        :return: The current state and the positions (x and y) of the cells that changed, sorted by rows.
+        """
+        generation = self.__styles.generation
+        codes, style_ids = self.__codes.copy(), self.__style_ids.copy()
+
+        if previous is None or previous[1].shape != codes.shape:
+            changed = codes != EMPTY_CODE
+        else:
+            previous_generation, previous_codes, previous_style_ids = previous
+            changed = codes != previous_codes
+
+            # The identifiers of the styles can be reused after a compaction, all the characters changed.
+            if previous_generation != generation:
+                changed |= codes != EMPTY_CODE
+            else:
+                changed |= (codes != EMPTY_CODE) & (style_ids != previous_style_ids)
+
+        ys, xs = np.nonzero(changed)
+
+        return (generation, codes, style_ids), list(zip(xs.tolist(), ys.tolist()))
+
+    @staticmethod
+    def scroll_state(state: StateType, top: int, bottom: int, lines: int) -> StateType:
+        """
+        Scroll the rows of a state returned by diff, the same as StreamBuffer.scroll does with the cells.
+
+        :param state: State returned by diff.
+        :param top: First row of region.
+        :param bottom: Last row (excluded) of region.
+        :param lines: Number of rows, up if it is positive and down if it is negative.
+        :return: The scrolled state, the rows uncovered are empty.
+        """
+        count = min(abs(lines), bottom - top)
+        generation, codes, style_ids = state[0], state[1].copy(), state[2].copy()
+
+        for array in (codes, style_ids):
+            if lines > 0:
+                array[top:bottom - count] = array[top + count:bottom]
+                array[bottom - count:bottom] = EMPTY_CODE
+            else:
+                array[top + count:bottom] = array[top:bottom - count]
+                array[top:top + count] = EMPTY_CODE
+
+        return generation, codes, style_ids
+
+    @property
+    def shape(self) -> typing.Tuple[int, int]:
+        return self.__rows, self.__cols
+
+    @shape.setter
+    def shape(self, shape: typing.Tuple[int, int]):
+        self.reshape(shape)
+
+    def __iter__(self) -> typing.Generator[typing.Union[CharacterAttribute, RectangleAttribute], None, None]:
+        yield from list(self.__rectangles.values())
+
+        ys, xs = np.nonzero(self.__codes)
+
+        cells = zip(xs.tolist(), ys.tolist(), self.__codes[ys, xs].tolist(), self.__style_ids[ys, xs].tolist())
+
+        for cell in cells:
+            yield self.__styles.create_character_attr(*cell)
@@ -1,10 +1,81 @@
 import dataclasses
 import enum
+import typing
 
 import kurses.colors
 
 DEFAULT_PTSIZE = 16
 
+STYLE_BOLD = 0x1
+STYLE_ITALIC = 0x2
+STYLE_UNDERLINE = 0x4
+STYLE_STRIKETHROUGH = 0x8
+
+CELL_KEY_CODE_SHIFT, CELL_KEY_CODE_MASK = 0, 0x1FFFFF
+CELL_KEY_STYLE_SHIFT, CELL_KEY_STYLE_MASK = 21, 0xF
+CELL_KEY_FOREIGN_SHIFT, CELL_KEY_FOREIGN_MASK = 25, 0xFFFFFF
+CELL_KEY_BACKGROUND_SHIFT, CELL_KEY_BACKGROUND_MASK = 49, 0xFFFFFF
+CELL_KEY_SX_SHIFT, CELL_KEY_SY_SHIFT, CELL_KEY_SCALE_MASK = 73, 81, 0xFF
+CELL_KEY_GLYPH_MASK = (CELL_KEY_STYLE_MASK << CELL_KEY_STYLE_SHIFT) | CELL_KEY_CODE_MASK
+
+MAX_SCALE = CELL_KEY_SCALE_MASK + 1
+
+
+def pack_rgb888(color: kurses.colors.TupleColor) -> int:
+    r, g, b = color
+
+    return ((int(r) & 0xFF) << 16) | ((int(g) & 0xFF) << 8) | (int(b) & 0xFF)
+
+
+def unpack_rgb888(value: int) -> kurses.colors.TupleColor:
+    return (value >> 16) & 0xFF, (value >> 8) & 0xFF, value & 0xFF
+
+
+def pack_cell_key(code: int, foreign: kurses.colors.TupleColor, background: kurses.colors.TupleColor, style: int = 0,
+                  sx: int = 1, sy: int = 1) -> int:
+    """
+    Pack the attributes that change how a character is drawn into an integer, the colors are kept exact so the key
+    identifies the glyph drawn.
+
+    Bits 0-20 code, 21-24 style, 25-48 foreign (RGB888), 49-72 background (RGB888), 73-80 sx - 1 and 81-88 sy - 1.
+
+    :param code: Character code.
+    :param foreign: Foreign color.
+    :param background: Background color.
+    :param style: Style bits (STYLE_BOLD, STYLE_ITALIC, STYLE_UNDERLINE and STYLE_STRIKETHROUGH).
+    :param sx: X-axis scale, from 1 to MAX_SCALE.
+    :param sy: Y-axis scale, from 1 to MAX_SCALE.
+    :return: int
+    """
+    if not (0 < sx <= MAX_SCALE and 0 < sy <= MAX_SCALE):
+        raise ValueError(f"The scale ({sx}, {sy}) is out of the range (1, {MAX_SCALE})")
+
+    return (
+        ((code & CELL_KEY_CODE_MASK) << CELL_KEY_CODE_SHIFT) |
+        ((style & CELL_KEY_STYLE_MASK) << CELL_KEY_STYLE_SHIFT) |
+        (pack_rgb888(foreign) << CELL_KEY_FOREIGN_SHIFT) |
+        (pack_rgb888(background) << CELL_KEY_BACKGROUND_SHIFT) |
+        ((int(sx) - 1) << CELL_KEY_SX_SHIFT) |
+        ((int(sy) - 1) << CELL_KEY_SY_SHIFT)
+    )
+
+
+def unpack_cell_key(key: int) -> typing.Tuple[int, kurses.colors.TupleColor, kurses.colors.TupleColor, int, int, int]:
+    """
+    Unpack the attributes of a key created by pack_cell_key.
+
+    :param key: Cell key.
+    :return: Code, foreign, background, style, sx and sy.
+    """
+    return (
+        (key >> CELL_KEY_CODE_SHIFT) & CELL_KEY_CODE_MASK,
+        unpack_rgb888((key >> CELL_KEY_FOREIGN_SHIFT) & CELL_KEY_FOREIGN_MASK),
+        unpack_rgb888((key >> CELL_KEY_BACKGROUND_SHIFT) & CELL_KEY_BACKGROUND_MASK),
+        (key >> CELL_KEY_STYLE_SHIFT) & CELL_KEY_STYLE_MASK,
+        ((key >> CELL_KEY_SX_SHIFT) & CELL_KEY_SCALE_MASK) + 1,
+        ((key >> CELL_KEY_SY_SHIFT) & CELL_KEY_SCALE_MASK) + 1,
+    )
+
 
 @dataclasses.dataclass
 class Attribute:
@@ -24,17 +95,24 @@ class CharacterAttribute(Attribute):
     blink: int = 0
     sx: int = 1
     sy: int = 1
+    key: int = dataclasses.field(default=0, repr=False, compare=False)
+
+    def __post_init__(self):
+        if isinstance(self.code, str):
+            self.code = ord(self.code)
+
+        # The key is packed here unless it is given already packed (see kurses.stream.style.StyleTable).
+        if not self.key:
+            self.key = pack_cell_key(self.code, self.foreign, self.background, self.style, self.sx, self.sy)
 
     def __eq__(self, other):
-        return self.code == other.code
+        if not isinstance(other, CharacterAttribute):
+            return NotImplemented
 
-    def __hash__(self):
-        _hash_tuple = (
-            self.code, self.foreign, self.background, self.bold, self.italic, self.underline, self.strikethrough,
-            self.sx, self.sy
-        )
+        return self.key == other.key
 
-        return hash(_hash_tuple)
+    def __hash__(self):
+        return self.key
 
     def __bool__(self):
         return not self.code == ord(' ')
@@ -43,6 +121,11 @@ class CharacterAttribute(Attribute):
     def chr(self) -> str:
         return chr(self.code)
 
+    @property
+    def style(self) -> int:
+        return (STYLE_BOLD if self.bold else 0) | (STYLE_ITALIC if self.italic else 0) | \
+            (STYLE_UNDERLINE if self.underline else 0) | (STYLE_STRIKETHROUGH if self.strikethrough else 0)
+
     @property
     def position(self):
         return self.x, self.y
@@ -1,10 +1,23 @@
+import copy
+import dataclasses
+import itertools
 import typing
 
-from kurses.stream import CharacterAttribute, RectangleAttribute
+from kurses.stream.attributes import CharacterAttribute, RectangleAttribute
+from kurses.stream.style import StyleTable, pack_cell, unpack_cell, CELL_STYLE_ID_SHIFT
 
+if typing.TYPE_CHECKING:
+    import numpy as np
 
-def fix_position_attribute(shape: typing.Tuple[int, int], index: typing.Tuple[int, int],
-                           attr: typing.Union[CharacterAttribute, RectangleAttribute]):
+CellPosition = typing.Tuple[int, int]
+CellType = typing.Union[int, RectangleAttribute]
+RowsType = typing.List[typing.List[typing.Optional[CellType]]]
+
+# State of the matrix compared by diff: the generation of the style table and the rows.
+StateType = typing.Tuple[int, RowsType]
+
+
+def wrap_position(shape: typing.Tuple[int, int], index: typing.Tuple[int, int]) -> CellPosition:
     rows, columns = shape
     x, y = index
 
@@ -16,15 +29,151 @@ def fix_position_attribute(shape: typing.Tuple[int, int], index: typing.Tuple[in
         x = x + (columns + 1)
         y -= 1
 
+    return x, y
+
+
+def fix_position_attribute(shape: typing.Tuple[int, int], index: typing.Tuple[int, int],
+                           attr: typing.Union[CharacterAttribute, RectangleAttribute]):
+    x, y = wrap_position(shape, index)
+
     attr.x = x
     attr.y = y
 
     return (x, y), attr
 
 
-def protect_buffer_matrix(shape: typing.Tuple[int, int], index: typing.Tuple[int, int], buffer: typing.List[
-    typing.List[typing.Optional[typing.Union[CharacterAttribute, RectangleAttribute]]]],
-                          attr: typing.Union[CharacterAttribute, RectangleAttribute]):
+def get_row_spans(shape: typing.Tuple[int, int], index: typing.Tuple[int, int],
+                  length: int) -> typing.Generator[typing.Tuple[int, int, int, int], None, None]:
+    """
+    Split a run of cells from a position into spans of the rows, the positions wrap like fix_position_attribute (the
+    column past the last one is hidden) and the spans out of the matrix are skipped.
+
+    :param shape: Shape of matrix (rows and columns).
+    :param index: Position (x and y) of the first cell.
+    :param length: Number of cells.
+    :return: typing.Generator[typing.Tuple[int, int, int, int], None, None] with y, x, offset in the run and length.
+    """
+    rows, columns = shape
+    period = columns + 1
+    x, y = index
+    offset = 0
+
+    while offset < length:
+        lines, _x = divmod(x + offset, period)
+        _y = y + lines
+
+        if _x >= columns:
+            offset += 1
+            continue
+
+        count = min(columns - _x, length - offset)
+
+        if 0 <= _y < rows:
+            yield _y, _x, offset, count
+
+        offset += count
+
+
+def clip_region(shape: typing.Tuple[int, int], x: int, y: int, w: int, h: int) -> typing.Optional[
+        typing.Tuple[int, int, int, int]]:
+    """
+    Clip a region of cells to the matrix, the regions do not wrap like the text.
+
+    :param shape: Shape of matrix (rows and columns).
+    :param x: X-axis position of region.
+    :param y: Y-axis position of region.
+    :param w: Width of region.
+    :param h: Height of region.
+    :return: typing.Optional[typing.Tuple[int, int, int, int]] with the first and the last (excluded) columns and rows,
+        None if the region is out of the matrix.
+    """
+    rows, columns = shape
+    x0, y0, x1, y1 = max(x, 0), max(y, 0), min(x + w, columns), min(y + h, rows)
+
+    if x0 >= x1 or y0 >= y1:
+        return None
+
+    return x0, y0, x1, y1
+
+
+RegionType = typing.Tuple[int, int, int, int]
+
+
+def clip_blit(src_shape: typing.Tuple[int, int], dst_shape: typing.Tuple[int, int], src_rect: RegionType,
+              dst_xy: typing.Tuple[int, int]) -> typing.Optional[typing.Tuple[int, int, int, int, int, int]]:
+    """
+    Clip a copy of a region to the source and the destination matrices.
+
+    :param src_shape: Shape of source matrix (rows and columns).
+    :param dst_shape: Shape of destination matrix (rows and columns).
+    :param src_rect: Region of source (x, y, w and h).
+    :param dst_xy: Position of region in the destination (x and y).
+    :return: typing.Optional[typing.Tuple[int, int, int, int, int, int]] with x and y of the source, x and y of the
+        destination, w and h, None if nothing is copied.
+    """
+    x, y, w, h = src_rect
+    dx, dy = dst_xy
+
+    region = clip_region(src_shape, x, y, w, h)
+
+    if region is None:
+        return None
+
+    x0, y0, x1, y1 = region
+    dx, dy = dx + x0 - x, dy + y0 - y
+    x, y, w, h = x0, y0, x1 - x0, y1 - y0
+
+    region = clip_region(dst_shape, dx, dy, w, h)
+
+    if region is None:
+        return None
+
+    x0, y0, x1, y1 = region
+
+    return x + x0 - dx, y + y0 - dy, x0, y0, x1 - x0, y1 - y0
+
+
+def subtract_region(region: RegionType, other: RegionType) -> typing.List[RegionType]:
+    """
+    Get the parts of a region (x, y, w and h) that are not covered by other region, at most four regions.
+
+    :param region: Region.
+    :param other: Region subtracted.
+    :return: typing.List[RegionType]
+    """
+    x0, y0, w, h = region
+    x1, y1 = x0 + w, y0 + h
+    i0, j0 = max(x0, other[0]), max(y0, other[1])
+    i1, j1 = min(x1, other[0] + other[2]), min(y1, other[1] + other[3])
+
+    if i0 >= i1 or j0 >= j1:
+        return [region] if w > 0 and h > 0 else []
+
+    parts = [
+        (x0, y0, w, j0 - y0),
+        (x0, j1, w, y1 - j1),
+        (x0, j0, i0 - x0, j1 - j0),
+        (i1, j0, x1 - i1, j1 - j0),
+    ]
+
+    return [part for part in parts if part[2] > 0 and part[3] > 0]
+
+
+def copy_region_attributes(src, dst, x: int, y: int, dx: int, dy: int, w: int, h: int):
+    """
+    Copy a region between matrices of different engines, reading the attributes of the cells one by one.
+    """
+    cells = [(i, j, src[x + i, y + j]) for j in range(h) for i in range(w)]
+
+    dst.clear_region(dx, dy, w, h)
+
+    for i, j, attr in cells:
+        if attr is not None:
+            dst[dx + i, dy + j] = copy.copy(attr)
+
+
+def protect_buffer_matrix(shape: typing.Tuple[int, int], index: typing.Tuple[int, int],
+                          buffer: RowsType, attr: CellType):
     rows, columns = shape
     x, y = index
 
@@ -35,14 +184,21 @@ def protect_buffer_matrix(shape: typing.Tuple[int, int], index: typing.Tuple[int
 
 
 class BufferMatrix:
-    def __init__(self, shape: typing.Tuple[int, int]):
+    """
+    Buffer matrix stored as lists of rows, the characters are stored as integers with the code and the identifier of
+    the style (see kurses.stream.style), and materialized as CharacterAttribute only when they are read.
+    """
+
+    def __init__(self, shape: typing.Tuple[int, int], styles: typing.Optional[StyleTable] = None):
         rows, columns = shape
 
         self.__rows: int = rows
         self.__cols: int = columns
-        self.__buffer_matrix: typing.List[
-            typing.List[typing.Optional[typing.Union[CharacterAttribute, RectangleAttribute]]]] = [[None] * columns for
-                                                                                                   _ in range(rows)]
+        self.__styles: StyleTable = StyleTable() if styles is None else styles
+        self.__has_rectangles = False
+        self.__buffer_matrix: RowsType = [[None] * columns for _ in range(rows)]
+
+        self.__styles.register(self)
 
     @property
     def cols(self) -> int:
@@ -52,6 +208,10 @@ class BufferMatrix:
     def rows(self) -> int:
         return self.__rows
 
+    @property
+    def style_table(self) -> StyleTable:
+        return self.__styles
+
     def __setitem__(self, index: typing.Tuple[int, int], value: typing.Union[CharacterAttribute, RectangleAttribute]):
         x, y = 0, 0
 
@@ -59,29 +219,259 @@ class BufferMatrix:
             x, y = index
 
         (x, y), value = fix_position_attribute(self.shape, (x, y), value)
+        cell: CellType
+
+        if isinstance(value, CharacterAttribute):
+            cell = pack_cell(value.code, self.__styles.intern_attribute(value))
+        else:
+            cell = value
+            self.__has_rectangles = True
+
+        protect_buffer_matrix(self.shape, (x, y), self.__buffer_matrix, cell)
 
-        protect_buffer_matrix(self.shape, (x, y), self.__buffer_matrix, value)
+    def __get_attr(self, x: int, y: int, cell: CellType) -> typing.Union[CharacterAttribute, RectangleAttribute]:
+        if isinstance(cell, int):
+            return self.__styles.create_character_attr(x, y, *unpack_cell(cell))
+
+        return cell
 
     def __getitem__(self, index: typing.Tuple[int, int]) -> typing.Union[CharacterAttribute, RectangleAttribute, None]:
         x, y = index
-
-        return self.__buffer_matrix[y][x]
+        cell = self.__buffer_matrix[y][x]
+
+        return None if cell is None else self.__get_attr(x, y, cell)
+
+    def put_text(self, x: int, y: int, text: str, style_id: int):
+        """
+        Write a run of characters with the same style from a position, the characters past the end of the row wrap
+        like __setitem__.
+
+        :param x: X-axis position of the first character.
+        :param y: Y-axis position of the first character.
+        :param text: Characters.
+        :param style_id: Identifier of the style in the style table of the matrix.
+        :return: None
+        """
+        base = pack_cell(0, style_id)
+
+        for _y, _x, offset, count in get_row_spans(self.shape, (x, y), len(text)):
+            self.__buffer_matrix[_y][_x:_x + count] = [base | ord(_chr) for _chr in text[offset:offset + count]]
+
+    def fill_region(self, x: int, y: int, w: int, h: int, code: int, style_id: int):
+        """
+        Fill a region with a character, the region is clipped to the matrix.
+
+        :param x: X-axis position of region.
+        :param y: Y-axis position of region.
+        :param w: Width of region.
+        :param h: Height of region.
+        :param code: Character code.
+        :param style_id: Identifier of the style in the style table of the matrix.
+        :return: None
+        """
+        region = clip_region(self.shape, x, y, w, h)
+
+        if region is None:
+            return
+
+        x0, y0, x1, y1 = region
+        cells = [pack_cell(code, style_id)] * (x1 - x0)
+
+        for row in self.__buffer_matrix[y0:y1]:
+            row[x0:x1] = cells
+
+    def put_region(self, x: int, y: int, codes: "np.ndarray", style_ids: "np.ndarray"):
+        """
+        Write a region of characters from 2D arrays (rows and columns) of codes and style identifiers, the region is
+        clipped to the matrix.
+
+        :param x: X-axis position of region.
+        :param y: Y-axis position of region.
+        :param codes: Character codes.
+        :param style_ids: Identifiers of the styles in the style table of the matrix.
+        :return: None
+        """
+        h, w = codes.shape
+        region = clip_region(self.shape, x, y, w, h)
+
+        if region is None:
+            return
+
+        x0, y0, x1, y1 = region
+        src = slice(y0 - y, y1 - y), slice(x0 - x, x1 - x)
+        cells = (style_ids[src].astype("uint64") << CELL_STYLE_ID_SHIFT) | codes[src]
+
+        for row, values in zip(self.__buffer_matrix[y0:y1], cells.tolist()):
+            row[x0:x1] = values
+
+    def clear_region(self, x: int, y: int, w: int, h: int):
+        """
+        Remove the characters and the rectangles of a region, the region is clipped to the matrix.
+
+        :param x: X-axis position of region.
+        :param y: Y-axis position of region.
+        :param w: Width of region.
+        :param h: Height of region.
+        :return: None
+        """
+        region = clip_region(self.shape, x, y, w, h)
+
+        if region is None:
+            return
+
+        x0, y0, x1, y1 = region
+        cells = [None] * (x1 - x0)
+
+        for row in self.__buffer_matrix[y0:y1]:
+            row[x0:x1] = cells
+
+    def blit(self, src: "BufferMatrix", src_rect: RegionType, dst_xy: typing.Tuple[int, int]):
+        """
+        Copy a region of a matrix (it can be the same matrix, the regions can overlap), the region is clipped to both
+        matrices. The styles are interned in the table of the matrix if the tables are different.
+
+        :param src: Source matrix.
+        :param src_rect: Region of source (x, y, w and h).
+        :param dst_xy: Position of region in the matrix (x and y).
+        :return: None
+        """
+        region = clip_blit(src.shape, self.shape, src_rect, dst_xy)
+
+        if region is None:
+            return
+
+        x, y, dx, dy, w, h = region
+
+        if not isinstance(src, BufferMatrix):
+            copy_region_attributes(src, self, x, y, dx, dy, w, h)
+            return
+
+        # The rows of the source are copied before writing, for the regions that overlap.
+        rows = [row[x:x + w] for row in src.__buffer_matrix[y:y + h]]
+        styles = None
+
+        if src.__styles is not self.__styles:
+            styles = self.__styles.import_styles(src.__styles, {
+                cell >> CELL_STYLE_ID_SHIFT for row in rows for cell in row if isinstance(cell, int)
+            })
+
+        for j, row in enumerate(rows):
+            # The rows of characters of the same table are copied as they are.
+            if styles is not None or (src.__has_rectangles and RectangleAttribute in set(map(type, row))):
+                for i, cell in enumerate(row):
+                    if isinstance(cell, RectangleAttribute):
+                        row[i] = dataclasses.replace(cell, x=dx + i, y=dy + j)
+                        self.__has_rectangles = True
+                    elif styles is not None and cell is not None:
+                        code, style_id = unpack_cell(cell)
+                        row[i] = pack_cell(code, styles[style_id])
+
+            self.__buffer_matrix[dy + j][dx:dx + w] = row
 
     def clear(self):
         self.__buffer_matrix = [[None] * self.__cols for _ in range(self.__rows)]
+        self.__has_rectangles = False
+
+    def __cells(self) -> typing.Generator[typing.Tuple[int, int, CellType], None, None]:
+        for y, row in enumerate(self.__buffer_matrix):
+            for x, cell in enumerate(row):
+                if cell is not None:
+                    yield x, y, cell
 
     def reshape(self, shape: typing.Tuple[int, int]):
-        all_buff_objects = [obj for obj in self]
+        cells = list(self.__cells())
 
         self.__rows, self.__cols = shape
         self.__buffer_matrix = [[None] * self.__cols for _ in range(self.__rows)]
 
-        for obj in all_buff_objects:
-            x, y = obj.x, obj.y
+        for x, y, cell in cells:
+            if isinstance(cell, RectangleAttribute):
+                (x, y), cell = fix_position_attribute(self.shape, (x, y), copy.copy(cell))
+            else:
+                x, y = wrap_position(self.shape, (x, y))
+
+            protect_buffer_matrix(self.shape, (x, y), self.__buffer_matrix, cell)
 
-            (x, y), value = fix_position_attribute(self.shape, (x, y), obj)
+    def copy(self) -> "BufferMatrix":
+        """
+        Copy the matrix, the rectangles and the style table are shared because they are not modified once they are in
+        the matrix.
 
-            protect_buffer_matrix(self.shape, (x, y), self.__buffer_matrix, value)
+        :return: BufferMatrix
+        """
+        matrix = copy.copy(self)
+        matrix.__buffer_matrix = [row[:] for row in self.__buffer_matrix]
+
+        self.__styles.register(matrix)
+
+        return matrix
+
+    def get_used_style_ids(self) -> typing.Set[int]:
+        """
+        Get the identifiers of the styles used by the characters, for the compactions of the style table.
+
+        :return: typing.Set[int]
+        """
+        return {cell >> CELL_STYLE_ID_SHIFT for row in self.__buffer_matrix for cell in row if isinstance(cell, int)}
+
+    def rectangles(self) -> typing.List[RectangleAttribute]:
+        return [cell for row in self.__buffer_matrix for cell in row if isinstance(cell, RectangleAttribute)]
+
+    def diff(self, previous: typing.Optional[StateType]) -> typing.Tuple[StateType, typing.List[CellPosition]]:
+        """
+        Compare the characters of the matrix with a previous state, the cells store the code and the style so the rows
+        are compared as they are.
+
+        :param previous: State returned by the previous call, or None.
+        :return: The current state and the positions (x and y) of the cells that changed, sorted by rows.
+        """
+        generation = self.__styles.generation
+        current = [row[:] for row in self.__buffer_matrix]
+
+        if previous is None:
+            return (generation, current), [(x, y) for y, row in enumerate(current) for x, cell in enumerate(row) if
+                                           isinstance(cell, int)]
+
+        previous_generation, previous_rows = previous
+
+        # The identifiers of the styles can be reused after a compaction, all the characters of the state changed.
+        if previous_generation != generation:
+            previous_rows = [[-1 if isinstance(cell, int) else cell for cell in row] for row in previous_rows]
+
+        changed: typing.List[CellPosition] = []
+        empty_row: typing.List[typing.Optional[CellType]] = []
+
+        for y, (row, previous_row) in enumerate(itertools.zip_longest(current, previous_rows, fillvalue=empty_row)):
+            if row == previous_row:
+                continue
+
+            changed.extend(
+                (x, y) for x, (cell, previous_cell) in enumerate(itertools.zip_longest(row, previous_row)) if
+                cell != previous_cell and (isinstance(cell, int) or isinstance(previous_cell, int))
+            )
+
+        return (generation, current), changed
+
+    @staticmethod
+    def scroll_state(state: StateType, top: int, bottom: int, lines: int) -> StateType:
+        """
+        Scroll the rows of a state returned by diff, the same as StreamBuffer.scroll does with the cells.
+
+        :param state: State returned by diff.
+        :param top: First row of region.
+        :param bottom: Last row (excluded) of region.
+        :param lines: Number of rows, up if it is positive and down if it is negative.
+        :return: The scrolled state, the rows uncovered are empty.
+        """
+        generation, state_rows = state
+        height = bottom - top
+        count = min(abs(lines), height)
+        empty: RowsType = [[None] * len(state_rows[top]) for _ in range(count)]
+        rows = state_rows[top:bottom]
+
+        rows = rows[count:] + empty if lines > 0 else empty + rows[:height - count]
+
+        return generation, state_rows[:top] + rows + state_rows[bottom:]
 
     @property
     def shape(self) -> typing.Tuple[int, int]:
@@ -92,9 +482,5 @@ class BufferMatrix:
         self.__rows, self.__cols = shape
 
     def __iter__(self) -> typing.Generator[typing.Union[CharacterAttribute, RectangleAttribute], None, None]:
-        for i in range(self.__rows):
-            for j in range(self.__cols):
-                attr = self.__buffer_matrix[i][j]
-
-                if attr is not None:
-                    yield attr
+        for x, y, cell in self.__cells():
+            yield self.__get_attr(x, y, cell)
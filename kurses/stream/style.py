@@ -0,0 +1,280 @@
+import contextlib
+import dataclasses
+import threading
+import typing
+import weakref
+
+import kurses.colors
+from kurses.stream.attributes import CharacterAttribute, STYLE_BOLD, STYLE_ITALIC, STYLE_UNDERLINE, \
+    STYLE_STRIKETHROUGH, CELL_KEY_CODE_MASK, pack_cell_key
+
+CELL_STYLE_ID_SHIFT = 21
+
+DEFAULT_MAX_STYLES = 4096
+
+
+def pack_cell(code: int, style_id: int) -> int:
+    """
+    Pack the character code and the style identifier of a cell into an integer.
+
+    :param code: Character code.
+    :param style_id: Identifier of the style in a StyleTable.
+    :return: int
+    """
+    return (style_id << CELL_STYLE_ID_SHIFT) | (code & CELL_KEY_CODE_MASK)
+
+
+def unpack_cell(cell: int) -> typing.Tuple[int, int]:
+    """
+    Unpack a cell created by pack_cell.
+
+    :param cell: Cell.
+    :return: Code and style identifier.
+    """
+    return cell & CELL_KEY_CODE_MASK, cell >> CELL_STYLE_ID_SHIFT
+
+
+def to_color(color: kurses.colors.TupleColor) -> kurses.colors.TupleColor:
+    r, g, b = color
+
+    return int(r), int(g), int(b)
+
+
+@dataclasses.dataclass(frozen=True)
+class Style:
+    foreign: kurses.colors.TupleColor = (255, 255, 255)
+    background: kurses.colors.TupleColor = (0, 0, 0)
+    style: int = 0
+    blink: int = 0
+    sx: int = 1
+    sy: int = 1
+
+    @property
+    def key(self) -> int:
+        """
+        Get the cell key (see kurses.stream.attributes.pack_cell_key) of the style, without the character code.
+
+        :return: int
+        """
+        return pack_cell_key(0, self.foreign, self.background, self.style, self.sx, self.sy)
+
+
+class StyleTable:
+    """
+    Table of the combinations of colors, style, blink and scale used by the cells, each combination is interned to a
+    small integer, so the cells only store the character code and the identifier of the style.
+
+    The table tracks the matrices that store its identifiers (see register). When it reaches max_styles, the
+    identifiers that are not used by any cell of the matrices (or returned since the last compaction) are freed and
+    reused, and the generation is incremented so the states of diff taken before are not trusted anymore.
+    """
+
+    def __init__(self, max_styles: int = DEFAULT_MAX_STYLES):
+        """
+        StyleTable constructor.
+
+        :param max_styles: Number of styles that starts a compaction, the limit is doubled when most of the styles
+            are in use.
+        """
+        self.__ids: typing.Dict[typing.Tuple, int] = {}
+        self.__values: typing.List[typing.Optional[typing.Tuple]] = []
+        self.__styles: typing.List[Style] = []
+        self.__keys: typing.List[int] = []
+        self.__free: typing.List[int] = []
+        self.__recent: typing.Set[int] = set()
+        self.__matrices: "weakref.WeakSet[typing.Any]" = weakref.WeakSet()
+        self.__max_styles = max_styles
+        self.__generation = 0
+        self.__batches = 0
+        self.__lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.__styles)
+
+    def __getitem__(self, style_id: int) -> Style:
+        return self.__styles[style_id]
+
+    def __iter__(self) -> typing.Iterator[Style]:
+        return iter(self.__styles)
+
+    @property
+    def keys(self) -> typing.List[int]:
+        """
+        Get the cell keys of the styles (without the character code), indexed by identifier.
+
+        :return: typing.List[int]
+        """
+        return self.__keys
+
+    @property
+    def generation(self) -> int:
+        """
+        Get the number of compactions that freed identifiers, an identifier can mean other style after it changes.
+
+        :return: int
+        """
+        return self.__generation
+
+    @property
+    def max_styles(self) -> int:
+        return self.__max_styles
+
+    @property
+    def used(self) -> int:
+        """
+        Get the number of identifiers in the table that are not free.
+
+        :return: int
+        """
+        return len(self.__styles) - len(self.__free)
+
+    def register(self, matrix: typing.Any) -> None:
+        """
+        Track a matrix that stores identifiers of the table, its identifiers in use (see get_used_style_ids of the
+        matrices) are kept by the compactions while the matrix is alive.
+
+        :param matrix: Buffer matrix.
+        :return: None
+        """
+        self.__matrices.add(matrix)
+
+    @contextlib.contextmanager
+    def batch(self) -> typing.Iterator["StyleTable"]:
+        """
+        Defer the compactions while several styles are interned before they are written into a matrix, the table
+        grows instead.
+
+        :return: typing.Iterator[StyleTable]
+        """
+        self.__batches += 1
+
+        try:
+            yield self
+        finally:
+            self.__batches -= 1
+
+    def intern(self, foreign: kurses.colors.TupleColor = (255, 255, 255),
+               background: kurses.colors.TupleColor = (0, 0, 0), style: int = 0, blink: int = 0, sx: int = 1,
+               sy: int = 1) -> int:
+        """
+        Get the identifier of a style, adding it to the table if it is new.
+
+        :param foreign: Foreign color.
+        :param background: Background color.
+        :param style: Style bits (see kurses.stream.attributes).
+        :param blink: Blink of character.
+        :param sx: X-axis scale.
+        :param sy: Y-axis scale.
+        :return: int
+        """
+        values = tuple(foreign), tuple(background), style, blink, sx, sy
+
+        with self.__lock:
+            style_id = self.__ids.get(values)
+
+            if style_id is None:
+                style_id = self.__add(values, Style(to_color(foreign), to_color(background), int(style), int(blink),
+                                                    int(sx), int(sy)))
+
+            self.__recent.add(style_id)
+
+        return style_id
+
+    def __add(self, values: typing.Tuple, _style: Style) -> int:
+        key = _style.key
+
+        if not self.__free and not self.__batches and len(self.__styles) >= self.__max_styles:
+            self.__compact()
+
+        if self.__free:
+            style_id = self.__free.pop()
+            self.__values[style_id] = values
+            self.__styles[style_id] = _style
+            self.__keys[style_id] = key
+        else:
+            style_id = len(self.__styles)
+            self.__values.append(values)
+            self.__styles.append(_style)
+            self.__keys.append(key)
+
+        self.__ids[values] = style_id
+
+        return style_id
+
+    def __compact(self):
+        used = set(self.__recent)
+
+        for matrix in list(self.__matrices):
+            used.update(matrix.get_used_style_ids())
+
+        self.__recent = set()
+        self.__free = [style_id for style_id in range(len(self.__styles) - 1, -1, -1) if style_id not in used]
+
+        for style_id in self.__free:
+            values = self.__values[style_id]
+
+            if values is not None:
+                del self.__ids[values]
+                self.__values[style_id] = None
+
+        if self.__free:
+            self.__generation += 1
+
+        # Most of the styles are in use, the table grows instead of compacting again soon.
+        if len(self.__free) < self.__max_styles // 4:
+            self.__max_styles *= 2
+
+    def intern_attribute(self, attr: CharacterAttribute) -> int:
+        """
+        Get the identifier of the style of a character attribute, adding it to the table if it is new.
+
+        :param attr: Character attribute.
+        :return: int
+        """
+        return self.intern(attr.foreign, attr.background, attr.style, attr.blink, attr.sx, attr.sy)
+
+    def import_styles(self, table: "StyleTable", style_ids: typing.Iterable[int]) -> typing.Dict[int, int]:
+        """
+        Intern the styles of other table.
+
+        :param table: Other table.
+        :param style_ids: Identifiers of the styles in the other table.
+        :return: typing.Dict[int, int] with the identifiers of the other table and of this table.
+        """
+        if table is self:
+            return {style_id: style_id for style_id in style_ids}
+
+        with self.batch():
+            return {
+                style_id: self.intern(_style.foreign, _style.background, _style.style, _style.blink, _style.sx,
+                                      _style.sy)
+                for style_id, _style in ((style_id, table[style_id]) for style_id in style_ids)
+            }
+
+    def create_character_attr(self, x: int, y: int, code: int, style_id: int) -> CharacterAttribute:
+        """
+        Create the character attribute of a cell, the colors are shared with the style.
+
+        :param x: X-axis position.
+        :param y: Y-axis position.
+        :param code: Character code.
+        :param style_id: Identifier of the style.
+        :return: CharacterAttribute
+        """
+        _style = self.__styles[style_id]
+
+        return CharacterAttribute(
+            x=x,
+            y=y,
+            code=code,
+            foreign=_style.foreign,
+            background=_style.background,
+            bold=bool(_style.style & STYLE_BOLD),
+            italic=bool(_style.style & STYLE_ITALIC),
+            underline=bool(_style.style & STYLE_UNDERLINE),
+            strikethrough=bool(_style.style & STYLE_STRIKETHROUGH),
+            blink=_style.blink,
+            sx=_style.sx,
+            sy=_style.sy,
+            key=self.__keys[style_id] | code
+        )
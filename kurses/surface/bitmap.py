@@ -9,11 +9,25 @@ H = typing.TypeVar("H", bound="BitmapSurface")
 class BitmapSurface(abc.ABC, typing.Generic[H]):
     def __init__(self, graphics: kurses.graphics.GraphicsBuffer):
         self.__graphics = graphics
+        self._draw_calls = 0
 
     @property
     def graphics(self):
         return self.__graphics
 
+    @graphics.setter
+    def graphics(self, graphics: kurses.graphics.GraphicsBuffer):
+        self.__graphics = graphics
+
+    @property
+    def draw_calls(self) -> int:
+        """
+        Get the number of draw calls issued by the surface, since it was created.
+
+        :return: int
+        """
+        return self._draw_calls
+
     @abc.abstractmethod
     def create(self, surface: H): ...
 
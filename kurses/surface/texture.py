@@ -11,6 +11,16 @@ class TextureSurface(abc.ABC, typing.Generic[K]):
     def __init__(self, font: kurses.font_resources.FontResources, streams: typing.List[kurses.stream.StreamBuffer]):
         self.__font = font
         self.__streams = streams
+        self._draw_calls = 0
+
+    @property
+    def draw_calls(self) -> int:
+        """
+        Get the number of draw calls issued by the surface, since it was created.
+
+        :return: int
+        """
+        return self._draw_calls
 
     @abc.abstractmethod
     def create(self, surface: K): ...
@@ -40,6 +50,17 @@ class TextureSurface(abc.ABC, typing.Generic[K]):
     @abc.abstractmethod
     def clear(self, surface: K) -> None: ...
 
+    @property
+    @abc.abstractmethod
+    def pending(self) -> bool:
+        """
+        Get if there are characters drawn with a placeholder (deferred by the raster budget of the font), they are
+        drawn again in the next present.
+
+        :return: bool
+        """
+        ...
+
     @property
     @abc.abstractmethod
     def current(self) -> typing.Union[K, None]: ...
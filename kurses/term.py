@@ -3,10 +3,14 @@ import enum
 import typing
 import warnings
 
+import kurses.clock
 import kurses.colors
 import kurses.events
+import kurses.font_resources
 import kurses.graphics
 import kurses.interface.joystick
+import kurses.interface.keyboard
+import kurses.profiler
 import kurses.stream
 import kurses.surface.texture
 from kurses.interface.battery import BatteryType
@@ -15,6 +19,7 @@ from kurses.interface.touch import TouchType
 from kurses.resources.buzzer import Buzzer
 
 DEFAULT_WINDOW_TITLE = "Virtual console"
+OVERLAY_ROWS = 2
 
 T = typing.TypeVar("T", bound="VirtualTerminal")
 
@@ -40,17 +45,58 @@ class VirtualTerminal(abc.ABC, typing.Generic[T]):
         :type title: str
         :keyword type_rendering: Type rendering, with default value Rendering.HARDWARE.
         :type type_rendering: Rendering
-        :keyword fps: Limit frames per second, with default value 30.
+        :keyword fps: Limit frames per second, with default value 30 (0 or None for no limit).
         :type fps: int
         :type bitmap_enabled: bool
         :keyword bitmap_enabled: Enable bitmap to be able to draw shapes on the terminal.
         :type sound_enabled: bool
         :keyword sound_enabled: Enable sound system in terminal.
+        :type idle: bool
+        :keyword idle: Block the main loop waiting events while no buffer has pending changes, with default value
+            False.
+        :type idle_timeout: int
+        :keyword idle_timeout: Max milliseconds blocked waiting events in idle mode, for the timers of the
+            application, with default value None (no limit).
+
+        :type coalesce_events: bool
+        :keyword coalesce_events: Deliver the mouse motion and the scroll once per frame (the latest position and
+            the accumulated scroll), with default value False.
+        :type pipelined: bool
+        :keyword pipelined: Run the runtime and the target in a thread of update, the main thread draws the
+            snapshot of the streams of the previous frame meanwhile, with default value False.
+        :type profile: bool
+        :keyword profile: Measure the phases of the frames of the main loop (see VirtualTerminal.stats), with default
+            value False.
+        :type profile_window: int
+        :keyword profile_window: Number of frames used to compute the statistics of the profiler, with default value
+            120.
+        :type overlay: bool
+        :keyword overlay: Show the statistics of the profiler on the terminal (enable the profiler), with default
+            value False.
+        :type matrix: typing.Type[kurses.stream.BufferMatrix]
+        :keyword matrix: Engine of the buffer matrix of the main stream, with default value BufferMatrix.
+        :type styles: kurses.stream.StyleTable
+        :keyword styles: Table of the styles of the characters of the streams of the terminal, with default value a new
+            table.
+
+        The keywords of the font (ptsize, depth_colors, quality, encoding and atlas) are passed to FontResources.
         """
         rows, cols = shape
+        styles: typing.Optional[kurses.stream.StyleTable] = kwargs.get("styles", None)
+
+        self.__styles: kurses.stream.StyleTable = kurses.stream.StyleTable() if styles is None else styles
+
         self.__main_bitmap = kurses.graphics.GraphicsBuffer()
-        self.__main_stream = kurses.stream.StreamBuffer(rows, cols)
+        self.__main_stream = kurses.stream.StreamBuffer(
+            rows, cols, matrix=kwargs.get("matrix", kurses.stream.BufferMatrix), styles=self.__styles
+        )
         self.__stream_list = [self.__main_stream]
+        self.__overlay_stream = None
+        self.__overlay_lines: typing.List[str] = []
+        self.__profiler = kurses.profiler.FrameProfiler(
+            kwargs.get("profile_window", kurses.profiler.DEFAULT_WINDOW_FRAMES),
+            kwargs.get("profile", False) or kwargs.get("overlay", False)
+        )
         self.__buffer_list = [self.__main_bitmap]
         self.__window_title = kwargs.get("title", "Virtual terminal")
         self.__type_rendering = kwargs.get("rendering", Rendering.HARDWARE)
@@ -62,8 +108,16 @@ class VirtualTerminal(abc.ABC, typing.Generic[T]):
         self._resizable = kwargs.get("resizable", False)
 
         self.fps = kwargs.get("fps", 30)
+        self.idle = kwargs.get("idle", False)
+        self.idle_timeout = kwargs.get("idle_timeout", None)
+        self.coalesce_events = kwargs.get("coalesce_events", False)
         self.running = True
 
+        if kwargs.get("overlay", False):
+            self.__overlay_stream = kurses.stream.StreamBuffer(rows, OVERLAY_ROWS, styles=self.__styles)
+            self.__overlay_stream.set_foreign_color((255, 255, 0))
+            self.__stream_list.append(self.__overlay_stream)
+
         if self.__bitmap_enabled:
             warnings.warn("The bitmap function is experimental; changes will likely occur in future versions.",
                           FutureWarning)
@@ -85,6 +139,15 @@ class VirtualTerminal(abc.ABC, typing.Generic[T]):
     def type_rendering(self) -> Rendering:
         return self.__type_rendering
 
+    @property
+    def styles(self) -> kurses.stream.StyleTable:
+        """
+        Get the table of the styles of the characters of the terminal, to create streams that share it.
+
+        :return: kurses.stream.StyleTable
+        """
+        return self.__styles
+
     @property
     def stream(self) -> kurses.stream.StreamBuffer:
         """
@@ -119,13 +182,68 @@ class VirtualTerminal(abc.ABC, typing.Generic[T]):
     @property
     def dt(self) -> float:
         """
-        Get the delta time of all loop program.
+        Get the delta time of all loop program, measured in seconds.
 
         :return: Delta time.
         :rtype: float
         """
         return self._dt
 
+    @property
+    @abc.abstractmethod
+    def clock(self) -> kurses.clock.FrameClock:
+        """
+        Get the frame clock of the main loop, with the measured frame time, frames per second and jitter.
+
+        :return: kurses.clock.FrameClock
+        """
+        ...
+
+    @property
+    def profiler(self) -> kurses.profiler.FrameProfiler:
+        return self.__profiler
+
+    @property
+    def stats(self) -> typing.Dict[str, typing.Any]:
+        """
+        Get the statistics of the main loop: frames per second and jitter of the clock, and the timings of the phases
+        and the counters (glyphs created and draw calls) per frame of the profiler.
+
+        :return: typing.Dict[str, typing.Any]
+        """
+        return {"fps": self.clock.fps, "jitter": self.clock.jitter, **self.__profiler.stats}
+
+    @property
+    def overlay(self) -> typing.Optional[kurses.stream.StreamBuffer]:
+        """
+        Get the stream of the overlay of statistics, None if the overlay is not enabled.
+
+        :return: typing.Optional[kurses.stream.StreamBuffer]
+        """
+        return self.__overlay_stream
+
+    def update_overlay(self) -> None:
+        """
+        Write the statistics of the profiler into the overlay, only if they changed so the overlay does not keep the
+        terminal pending (see idle).
+
+        :return: None
+        """
+        if self.__overlay_stream is None:
+            return
+
+        rows, columns = self.__overlay_stream.shape
+        lines = [line[:columns] for line in self.__profiler.report()[:rows]]
+
+        if lines == self.__overlay_lines:
+            return
+
+        self.__overlay_lines = lines
+        self.__overlay_stream.clrscr()
+
+        for y, line in enumerate(lines):
+            self.__overlay_stream.cputsxy(0, y, line)
+
     @property
     def resizable(self) -> bool:
         """
@@ -178,6 +296,43 @@ class VirtualTerminal(abc.ABC, typing.Generic[T]):
     def buffers(self):
         return self.__buffer_list
 
+    @property
+    def pending(self) -> bool:
+        """
+        Get if any stream or graphics buffer has changes that are not presented yet.
+
+        :return: bool
+        """
+        return any(stream.pending for stream in self.streams) or (
+                self.bitmap_enabled and any(buffer.pending for buffer in self.buffers))
+
+    @abc.abstractmethod
+    def invalidate(self) -> None:
+        """
+        Wake up the main loop in idle mode and draw the terminal again, it can be called from other threads.
+
+        :return: None
+        """
+        ...
+
+    @abc.abstractmethod
+    def preload(self, charset: typing.Union[str, typing.Iterable[int]], styles: typing.Iterable[int] = (0,),
+                colors: typing.Optional[kurses.font_resources.PreloadColors] = None,
+                progress: typing.Optional[kurses.font_resources.PreloadProgress] = None,
+                block: bool = False) -> kurses.font_resources.GlyphPreload:
+        """
+        Rasterize a set of characters of the font ahead of time, in worker threads. The glyphs are uploaded by the
+        main loop (every frame) or here when block is True, so a splash screen can show the progress.
+
+        :param charset: Characters (string or codes).
+        :param styles: Styles of the characters, with default value (0, ) (normal).
+        :param colors: Pairs of foreign and background colors (without atlas), with default value white on black.
+        :param progress: Function called with the uploaded and the total glyphs, after every upload.
+        :param block: Wait for the glyphs and upload them before return.
+        :return: kurses.font_resources.GlyphPreload
+        """
+        ...
+
     @property
     @abc.abstractmethod
     def title(self) -> str:
@@ -215,10 +370,22 @@ class VirtualTerminal(abc.ABC, typing.Generic[T]):
         ...
 
     @abc.abstractmethod
-    def main_loop(self):
+    def main_loop(self, frames: typing.Optional[int] = None):
         """
         Run virtual console, with all background service (SDL2 or Pygame).
 
+        :param frames: Number of frames to run, with default value None (run until quit).
+        :return: None
+        """
+        ...
+
+    @abc.abstractmethod
+    async def run(self, frames: typing.Optional[int] = None):
+        """
+        Run virtual console as a task of asyncio, yielding to the event loop between the frames. The methods of the
+        runtime and the target can be coroutines.
+
+        :param frames: Number of frames to run, with default value None (run until quit).
         :return: None
         """
         ...
@@ -226,12 +393,22 @@ class VirtualTerminal(abc.ABC, typing.Generic[T]):
     @abc.abstractmethod
     def keyspressed(self) -> typing.List[str]:
         """
-        Get all key pressed.
+        Get all key pressed, in the keyboard snapshot of the current frame.
 
         :return: typing.List[str]
         """
         ...
 
+    @property
+    @abc.abstractmethod
+    def keyboard(self) -> kurses.interface.keyboard.KeyboardInterface:
+        """
+        Get the keyboard snapshot of the current frame, with the keys pressed and the keys just pressed and released.
+
+        :return: kurses.interface.keyboard.KeyboardInterface
+        """
+        ...
+
     @abc.abstractmethod
     def joystick(self) -> typing.Tuple[kurses.interface.joystick.JoystickType, ...]:
         ...
@@ -240,6 +417,15 @@ class VirtualTerminal(abc.ABC, typing.Generic[T]):
     def mouse(self) -> typing.Tuple[typing.List[str], typing.Tuple[int, int], typing.Tuple[int, int]]:
         ...
 
+    @abc.abstractmethod
+    def mouse_delta(self) -> typing.Tuple[int, int]:
+        """
+        Get the motion of the mouse (pixels) accumulated in the current frame.
+
+        :return: typing.Tuple[int, int]
+        """
+        ...
+
     @property
     @abc.abstractmethod
     def window(self) -> T: